@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+from const import *
+from recruiting import RunMember
+from typing import *
+
+
+if TYPE_CHECKING:
+    from ba_recruiting import BARun
+
+
+# (Member ID, From Group Index, To Group Index)
+Move = Tuple[int, int, int]
+# (Members, Role Counts, Leader, Rendered Text) for every group
+RosterState = List[Tuple[List[RunMember], Dict[str, int], Optional[int], Optional[str]]]
+
+
+class OptimizeResult:
+    def __init__(self):
+        self.moves = []  # type: List[Tuple[RunMember, int, int]]
+        self.placed = []  # type: List[Tuple[RunMember, int]]
+
+
+def snapshot(run: BARun) -> RosterState:
+    return [
+        (list(group.members), dict(group.roles), group.leader, group.rendered)
+        for group in run.groups
+    ]
+
+
+def restore(run: BARun, state: RosterState):
+    for group, (members, roles, leader, rendered) in zip(run.groups, state):
+        group.members = list(members)
+        group.roles = dict(roles)
+        group.leader = leader
+        group.rendered = rendered
+    run.refresh_composition()
+
+
+def fits(run: BARun, role: str) -> bool:
+    return any(run.can_add(index, role) for index in range(6))
+
+
+class RosterSearch:
+    # Searches a detached copy of the roster, so it can yield to the event loop
+    # part way through without anyone seeing a half-moved roster
+    def __init__(self, run: BARun, budget: int):
+        self.run = run.roster_copy()
+        self.budget = budget
+        self.expanded = 0
+
+    def candidate_moves(self) -> Iterator[Move]:
+        for source in range(6):
+            # Members sharing a role are interchangeable, so only one of each is tried
+            tried = set()
+            for member in self.run.groups[source].members:
+                if member.role in tried:
+                    continue
+                tried.add(member.role)
+                for target in range(6):
+                    if target != source and len(self.run.groups[target]) < 8:
+                        yield member.id, source, target
+
+    async def find_moves(self, role: str, max_moves: int) -> Optional[List[Move]]:
+        # Iterative deepening, so the first plan found uses the fewest moves
+        start = snapshot(self.run)
+        for depth in range(1, max_moves + 1):
+            plan = await self.search(role, depth, [], start)
+            if plan is not None:
+                return plan
+            if self.budget <= 0:
+                break
+        return None
+
+    async def search(
+        self,
+        role: str,
+        depth: int,
+        plan: List[Move],
+        state: RosterState,
+    ) -> Optional[List[Move]]:
+        for move in list(self.candidate_moves()):
+            if self.budget <= 0:
+                return None
+            self.budget -= 1
+            self.expanded += 1
+            if self.expanded % BA_OPTIMIZE_YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+            found = None
+            member_id, _, target = move
+            if self.run.move_member(member_id, target):
+                if depth == 1:
+                    if fits(self.run, role):
+                        found = plan + [move]
+                else:
+                    found = await self.search(
+                        role, depth - 1, plan + [move], snapshot(self.run)
+                    )
+                restore(self.run, state)
+            if found is not None:
+                return found
+        return None
+
+
+async def optimize_roster(
+    run: BARun,
+    max_moves: int = BA_OPTIMIZE_MAX_MOVES,
+    budget: int = BA_OPTIMIZE_BUDGET,
+) -> OptimizeResult:
+    # Greedy in waitlist order: each player is placed with the fewest moves found,
+    # and never revisited. An early placement can use up room that would have fit
+    # several later players, so the count placed is not guaranteed to be the most.
+    result = OptimizeResult()
+    # Roles with no plan, cleared whenever a placement changes the roster
+    unplaceable = set()
+    for waiting in list(run.waitlist):
+        if waiting.id in run:
+            run.waitlist.remove(waiting)
+            continue
+        if waiting.role in unplaceable:
+            continue
+        # Every player gets a budget of their own, so one hard search starves nobody
+        plan = [] if fits(run, waiting.role) else await RosterSearch(
+            run, budget
+        ).find_moves(waiting.role, max_moves)
+        if plan is None:
+            unplaceable.add(waiting.role)
+            continue
+        start = snapshot(run)
+        moves = []
+        for member_id, source, target in plan:
+            member = run.groups[source].members[run.groups[source].get_index(member_id)]
+            if not run.move_member(member_id, target):
+                break
+            moves.append((member, source, target))
+        index = run.best_group_for(waiting.role) if len(moves) == len(plan) else None
+        if index is None:
+            # The plan no longer holds, put everyone back rather than half apply it
+            restore(run, start)
+            unplaceable.add(waiting.role)
+            continue
+        unplaceable.clear()
+        result.moves.extend(moves)
+        run.groups[index].add_member(waiting)
+        run.waitlist.remove(waiting)
+        result.placed.append((waiting, index))
+    return result
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+from ba_optimizer import optimize_roster
 import globals
 from utils import generate_button, schedule_task, wait_and_clear
 from const import *
 import discord
 import itertools
 from recruiting import *
+import storage
 import types
 from typing import *
 
@@ -15,7 +17,14 @@ if TYPE_CHECKING:
     from bot import PhoinixBot
 
 
+class RosterError(Exception):
+    # Carries the message shown to the member whose roster change was refused
+    pass
+
+
 class BAGroup(Group):
+    __slots__ = ("roles", "run", "rendered")
+
     def __init__(
         self,
         run: BARun,
@@ -24,10 +33,14 @@ class BAGroup(Group):
         index: int,
     ):
         super().__init__(members, leader, index)
-        self.roles = self.count_roles()
-        for role in BA_ROLE_EMOJI_MAPPING:
-            self.roles[role] = self.roles.get(role, 0)
+        for member in self.members:
+            member.role = BARole(member.role)
+        self.roles = dict.fromkeys(BARole, 0)  # type: Dict[BARole, int]
+        for member in self.members:
+            self.roles[member.role] += 1
         self.run = run
+        # Roster text for this group, None until it next needs rendering
+        self.rendered = None  # type: Optional[str]
 
     def needs(self) -> List[str]:
         need = []
@@ -42,13 +55,22 @@ class BAGroup(Group):
 
     def add_member(self, member: RunMember):
         self.members.append(member)
-        self.roles[member.role] = self.roles.get(member.role, 0) + 1
+        self.roles[member.role] += 1
+        self.rendered = None
+        self.run.refresh_composition()
 
     def remove_member(self, member: Union[int, RunMember]):
         for i, existing in enumerate(self.members):
             if member == existing:
                 self.roles[existing.role] -= 1
                 del self.members[i]
+                # The leader is stored by position, so keep it pointing at the same person
+                if self.leader == i:
+                    self.leader = None
+                elif self.leader is not None and self.leader > i:
+                    self.leader -= 1
+                self.rendered = None
+                self.run.refresh_composition()
                 break
 
     def can_add(self, role: str):
@@ -78,6 +100,86 @@ class BAGroup(Group):
         return iter(self.members)
 
 
+class Composition:
+    # The aggregates the composition rules read, built from each alliance group's size
+    # and role counts. Only depends on the fixed number of groups.
+    __slots__ = (
+        "needs_healer",
+        "needs_tank",
+        "unreserved",
+        "pair_missing_tank",
+        "pair_space",
+        "triple_missing_preceptor",
+        "triple_space",
+        "has_spirit_dart",
+        "has_feint",
+        "full_space",
+    )
+
+    def __init__(self, sizes: List[int], roles: List[Dict[BARole, int]]):
+        self.needs_healer = [group[BA_HEALER] == 0 for group in roles]
+        self.needs_tank = [
+            group[BA_BLUE_DPS] + group[BA_MAIN_TANK] == 0 for group in roles
+        ]
+        # Matches BAGroup.unreserved_space, a missing tank reserves both tank roles
+        self.unreserved = [
+            8 - sizes[i] - self.needs_healer[i] - 2 * self.needs_tank[i]
+            for i in range(6)
+        ]
+        self.pair_missing_tank = [
+            roles[i][BA_MAIN_TANK] + roles[i + 1][BA_MAIN_TANK] == 0
+            for i in range(0, 6, 2)
+        ]
+        self.pair_space = [
+            self.unreserved[2 * i]
+            + self.unreserved[2 * i + 1]
+            - self.pair_missing_tank[i]
+            for i in range(3)
+        ]
+        self.triple_missing_preceptor = [
+            sum(group[BA_PRECEPTOR] for group in roles[:3]) == 0,
+            sum(group[BA_PRECEPTOR] for group in roles[3:6]) == 0,
+        ]
+        mid_burden = int(self.pair_missing_tank[1])
+        self.triple_space = [
+            self.pair_space[0] + self.unreserved[2] - mid_burden,
+            self.pair_space[1] + self.unreserved[3] - mid_burden,
+        ]
+        self.has_spirit_dart = any(group[BA_SPIRIT_DART] for group in roles)
+        self.has_feint = any(group[BA_FEINT] for group in roles)
+        self.full_space = (
+            self.triple_space[0]
+            + self.triple_space[1]
+            - self.has_spirit_dart
+            - self.has_feint
+        )
+
+    def allows(self, index: int, role: str) -> bool:
+        needed = (role == BA_HEALER and self.needs_healer[index]) or (
+            role in BA_ANY_TANK and self.needs_tank[index]
+        )
+        if not (needed or self.unreserved[index] > 0):
+            return False
+        pair = index // 2
+        if not (
+            (self.pair_missing_tank[pair] and role == BA_MAIN_TANK)
+            or self.pair_space[pair] > 0
+        ):
+            return False
+        triple = 0 if index <= 2 else 1
+        if not (
+            (self.triple_missing_preceptor[triple] and role == BA_PRECEPTOR)
+            or self.triple_space[triple] > 0
+        ):
+            return False
+        if role == BA_SPIRIT_DART and not self.has_spirit_dart:
+            return True
+        if role == BA_FEINT and not self.has_feint:
+            return True
+        else:
+            return self.full_space > 0
+
+
 class BARun:
     def __init__(
         self,
@@ -93,6 +195,7 @@ class BARun:
         groups: Optional[
             List[Dict[str, Union[int, Dict[str, Union[str, int]]]]]
         ] = None,
+        waitlist: Optional[List[Dict[str, Union[str, int]]]] = None,
     ):
         self.id = int(id)
         self.channel_id = int(channel_id)
@@ -113,15 +216,54 @@ class BARun:
         )
         self.public = False
         self.signal = asyncio.Event()
+        # Serialises roster changes to this run, other runs are unaffected
+        self.lock = asyncio.Lock()
+        self.roster_message = None  # type: Optional[discord.PartialMessage]
+        self.embed_lock = asyncio.Lock()
+        self.embed_flush_scheduled = False
+        # Rosters posted before a view change lack its newer components, so the first
+        # edit after loading sends the current view along with the embed
+        self.view_sent = False
         if self.groups is None:
             self.groups = [BAGroup(self, [], None, i) for i in range(7)]
+        self.waitlist = [
+            RunMember(member["name"], BARole(member["role"]), member["id"])
+            for member in waitlist or []
+        ]
+        self.refresh_composition()
         self.password_auto_publish_running = False
         schedule_task(self.password_auto_publish_loop())
 
     async def update_embed(self):
+        # Changes within the debounce window share one edit of the roster message
+        if not self.embed_flush_scheduled:
+            self.embed_flush_scheduled = True
+            schedule_task(self.flush_embed())
+
+    async def flush_embed(self):
+        await asyncio.sleep(BA_EMBED_DEBOUNCE)
+        async with self.embed_lock:
+            self.embed_flush_scheduled = False
+            self.render_embed()
+            if self.roster_message is None:
+                channel = self.bot.get_channel(self.channel_id)
+                if channel is None:
+                    channel = await self.bot.fetch_channel(self.channel_id)
+                self.roster_message = channel.get_partial_message(self.roster_embed_id)
+            if self.view_sent:
+                await self.roster_message.edit(embed=self.embed.embed)
+            else:
+                await self.roster_message.edit(
+                    embed=self.embed.embed, view=BARunView(self)
+                )
+                self.view_sent = True
+
+    def render_embed(self):
         for index, group in enumerate(self.groups):
-            value = f"{group}"
-            value = "Empty" if value == "" else value
+            if group.rendered is not None:
+                continue
+            group.rendered = f"{group}"
+            value = "Empty" if group.rendered == "" else group.rendered
             if index < 6:
                 self.embed.set_group_text(
                     index, f"Group {index + 1} [{len(group)}/8]", value
@@ -130,89 +272,167 @@ class BARun:
                 self.embed.set_group_text(
                     index, f"Support Group [{len(group)}/5]", value
                 )
-        roster_message = await (
-            await self.bot.fetch_channel(self.channel_id)
-        ).fetch_message(self.roster_embed_id)
-        await roster_message.edit(embed=self.embed.embed)
-
-    def valid_single(self, index: int, role: str) -> bool:
-        needs = self.groups[index].needs()
-        return role in needs or self.groups[index].unreserved_space() > 0
-
-    def pair_unreserved_space(self, index: int) -> int:
-        given = self.groups[index]
-        paired = self.groups[index + (-1 if index % 2 else 1)]
-
-        return (
-            given.unreserved_space()
-            + paired.unreserved_space()
-            - (given.roles[BA_MAIN_TANK] + paired.roles[BA_MAIN_TANK] == 0)
+        self.embed.set_waitlist_text(
+            "\n".join(
+                f"{BA_ROLE_EMOJI_MAPPING.get(member.role)}: **{member.name}**"
+                for member in self.waitlist
+            )
         )
 
-    def valid_pair(self, index: int, role: str) -> bool:
-        given = self.groups[index]
-        paired = self.groups[index + (-1 if index % 2 else 1)]
-
-        if (
-            given.roles[BA_MAIN_TANK] + paired.roles[BA_MAIN_TANK] == 0
-            and role == BA_MAIN_TANK
-        ):
-            return True
-        return self.pair_unreserved_space(index) > 0
-
-    def triple_unreserved_space(self, index: int) -> int:
-        midl = self.groups[2]
-        midr = self.groups[3]
-        mid_burden = int(midl.roles[BA_MAIN_TANK] + midr.roles[BA_MAIN_TANK] == 0)
-        if index <= 2:
-            return self.pair_unreserved_space(0) + midl.unreserved_space() - mid_burden
-        else:
-            return self.pair_unreserved_space(3) + midr.unreserved_space() - mid_burden
-
-    def valid_triple(self, index: int, role: str) -> bool:
-        if index <= 2:
-            trip = self.groups[:3]
-        else:
-            trip = self.groups[-4:-1]
-        if (
-            sum(group.roles[BA_PRECEPTOR] for group in trip) == 0
-            and role == BA_PRECEPTOR
-        ):
-            return True
-        else:
-            return self.triple_unreserved_space(index) > 0
-
-    def full_unreserved_space(self) -> int:
-        all_roles = [group.roles for group in self.groups[:6]]
-        has_spirit_dart = sum(roles[BA_SPIRIT_DART] for roles in all_roles) > 0
-        has_feint = sum(roles[BA_FEINT] for roles in all_roles) > 0
-        return (
-            self.triple_unreserved_space(0)
-            + self.triple_unreserved_space(3)
-            - has_spirit_dart
-            - has_feint
+    def refresh_composition(self):
+        # Kept current on every roster change, so can_add is a handful of lookups
+        self.composition = Composition(
+            [len(group) for group in self.groups[:6]],
+            [group.roles for group in self.groups[:6]],
         )
 
     def can_add(self, index: int, role: str) -> bool:
-        if not self.valid_single(index, role):
-            return False
-        if not self.valid_pair(index, role):
+        if index == 6:
+            # The support group sits outside the alliance composition rules
+            return len(self.groups[6]) < 5
+        return self.composition.allows(index, role)
+
+    def flexibility(self, composition: Optional[Composition] = None) -> int:
+        composition = self.composition if composition is None else composition
+        return sum(
+            composition.allows(index, role)
+            for index in range(6)
+            for role in BA_ROLE_EMOJI_MAPPING
+        )
+
+    def roster_copy(self) -> BARun:
+        # Just the groups and waitlist, detached so a search can change them freely
+        copy = BARun.__new__(BARun)
+        copy.groups = [
+            BAGroup(copy, list(group.members), group.leader, group.index)
+            for group in self.groups
+        ]
+        copy.waitlist = list(self.waitlist)
+        copy.refresh_composition()
+        return copy
+
+    def composition_after(self, index: int, role: str, change: int) -> Composition:
+        # The aggregates with one member of role added to (1) or taken from (-1) a group
+        sizes = [len(group) for group in self.groups[:6]]
+        roles = [group.roles for group in self.groups[:6]]
+        sizes[index] += change
+        roles[index] = dict(roles[index])
+        roles[index][role] += change
+        return Composition(sizes, roles)
+
+    def best_group_for(self, role: str) -> Optional[int]:
+        # Tries the role in every alliance group that accepts it, keeping the placement
+        # that leaves the most (group, role) slots still open for everyone after. Each
+        # placement is scored on the aggregates it would leave, the groups are untouched.
+        best, best_score = None, -1
+        for index in range(6):
+            if not self.can_add(index, role):
+                continue
+            score = self.flexibility(self.composition_after(index, role, 1))
+            if score > best_score:
+                best, best_score = index, score
+        return best
+
+    def move_member(self, member: Union[int, RunMember], index: int) -> bool:
+        source = self.find_group_with(member)
+        if source is None or source.index == index:
             return False
-        if not self.valid_triple(index, role):
+        existing = source.members[source.get_index(member)]
+        # Checked against the roster as it would be once they leave, so a refused
+        # move changes nothing, not even the order or leader of the source group
+        if index == 6 or source.index == 6:
+            allowed = self.can_add(index, existing.role)
+        else:
+            allowed = self.composition_after(source.index, existing.role, -1).allows(
+                index, existing.role
+            )
+        if not allowed:
             return False
-        all_roles = [group.roles for group in self.groups[:6]]
-        has_spirit_dart = sum(roles[BA_SPIRIT_DART] for roles in all_roles) > 0
-        has_feint = sum(roles[BA_FEINT] for roles in all_roles) > 0
-        if role == BA_SPIRIT_DART and not has_spirit_dart:
-            return True
-        if role == BA_FEINT and not has_feint:
-            return True
+        source.remove_member(existing)
+        self.groups[index].add_member(existing)
+        return True
+
+    def join(self, member: RunMember, index: Optional[int]) -> int:
+        # Validates and commits in one step, a None index joins the best fitting group
+        if member in self:
+            raise RosterError("You are already in this run!")
+        if index is None:
+            index = self.best_group_for(member.role)
+            if index is None:
+                raise RosterError(
+                    "No group can take that role right now due to party composition"
+                    " restrictions."
+                )
+        elif not self.can_add(index, member.role):
+            raise RosterError(
+                "You cannot join the group as that role due to party composition"
+                " restrictions."
+            )
+        self.groups[index].add_member(member)
+        if member in self.waitlist:
+            self.waitlist.remove(member)
+        self.save()
+        return index
+
+    def join_waitlist(self, member: RunMember):
+        if member in self:
+            raise RosterError("You are already in this run!")
+        if member in self.waitlist:
+            raise RosterError("You are already on the waitlist!")
+        self.waitlist.append(member)
+        self.save()
+
+    def leave(self, member: Union[int, RunMember]) -> Optional[BAGroup]:
+        # Returns the group left, or None if the member was only waitlisted
+        group = self.find_group_with(member)
+        if group is not None:
+            group.remove_member(member)
+        elif member in self.waitlist:
+            self.waitlist.remove(member)
         else:
-            return self.full_unreserved_space() > 0
+            raise RosterError("You are already not in the run!")
+        self.save()
+        return group
+
+    def move(self, member: Union[int, RunMember], index: int):
+        if self.find_group_with(member) is None:
+            raise RosterError("That member is not in the run!")
+        if not self.move_member(member, index):
+            raise RosterError(
+                "The member cannot move to that group due to party composition"
+                " restrictions."
+            )
+        self.save()
+
+    def claim_leader(self, member: Union[int, RunMember]):
+        group = self.find_group_with(member)
+        if group is None:
+            raise RosterError("You are not in the run!")
+        if group.leader is not None:
+            raise RosterError("Your group already has a leader!")
+        group.leader = group.get_index(member)
+        group.rendered = None
+        self.save()
+
+    def relinquish_leader(self, member: Union[int, RunMember]):
+        group = self.find_group_with(member)
+        if group is None:
+            raise RosterError("You are not in the run!")
+        if group.leader is None or group.leader != group.get_index(member):
+            raise RosterError(
+                "You are already not the group leader, or you have been assigned"
+                " leader by default, and cannot relinquish it."
+            )
+        group.leader = None
+        group.rendered = None
+        self.save()
 
     def __eq__(self, other):
         return type(other) is BARun and other.id == self.id
 
+    def save(self):
+        storage.database.save_ba_run(self)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -224,6 +444,7 @@ class BARun:
             "icon": self.icon,
             "password": self.password,
             "run_time": self.run_time.isoformat(),
+            "waitlist": [member.to_dict() for member in self.waitlist],
         }
 
     async def wake_in(self, secs: float):
@@ -264,7 +485,9 @@ class BARun:
 
     async def ping_run(self, prepend: Optional[str] = None):
         prepend = "" if prepend is None else prepend
-        run_members = [await self.bot.fetch_member(member.id) for member in self]
+        run_members = (
+            await self.bot.members.resolve_many(member.id for member in self)
+        ).values()
         channel = await self.bot.fetch_channel(
             self.channel_id
         )  # type: discord.TextChannel
@@ -336,11 +559,31 @@ class BAEmbedWrapper:
         if index in range(8):
             self.embed.set_field_at(index + 2, name=name, value=value)
 
+    def set_waitlist_text(self, value: str):
+        # Older rosters were posted without a waitlist field, so it comes and goes
+        has_field = len(self.embed.fields) > 9
+        if value == "":
+            if has_field:
+                self.embed.remove_field(9)
+        elif has_field:
+            self.embed.set_field_at(9, name="Waitlist", value=value, inline=False)
+        else:
+            self.embed.add_field(name="Waitlist", value=value, inline=False)
+
 
 class RoleSelectView(discord.ui.View):
-    def __init__(self, group: BAGroup, *items: discord.ui.Item):
+    def __init__(
+        self,
+        run: BARun,
+        group: Optional[BAGroup],
+        *items: discord.ui.Item,
+        waitlist: bool = False,
+    ):
         super().__init__(*items)
+        self.run = run
+        # None means join whichever group fits best
         self.group = group
+        self.waitlist = waitlist
 
     @discord.ui.select(
         placeholder="Select a role.",
@@ -354,30 +597,38 @@ class RoleSelectView(discord.ui.View):
     async def role_select_callback(
         self, select: discord.ui.Select, interaction: discord.Interaction
     ):
-        role = select.values[0]
+        role = BARole(select.values[0])
         resp = interaction.response  # type: discord.InteractionResponse
-        if interaction.user.id in self.group.run:
-            await resp.send_message("You are already in this run!", ephemeral=True)
+        record = globals.verification_map.get(interaction.user.id, None)
+        member = RunMember(
+            record.name if record is not None else interaction.user.name,
+            role,
+            interaction.user.id,
+        )
+        try:
+            async with self.run.lock:
+                if self.waitlist:
+                    self.run.join_waitlist(member)
+                else:
+                    index = self.run.join(
+                        member, None if self.group is None else self.group.index
+                    )
+        except RosterError as e:
+            await resp.send_message(f"{e}", ephemeral=True)
             return
-        if self.group.can_add(role):
-            self.group.add_member(
-                RunMember(
-                    globals.verification_map.get(
-                        interaction.user.id, {"name": interaction.user.name}
-                    )["name"],
-                    role,
-                    interaction.user.id,
-                )
+        if self.waitlist:
+            await resp.send_message(
+                "Added to the waitlist. The host can fit you in with Optimize Roster.",
+                ephemeral=True,
             )
-            await resp.send_message("Successfully added!", ephemeral=True)
-            await self.group.run.update_embed()
-            return
-        await resp.send_message(
-            "You cannot join the group as that role due to party composition"
-            " restrictions.",
-            ephemeral=True,
-        )
-        return
+        else:
+            await resp.send_message(
+                f"Successfully added to Group {index + 1}!"
+                if self.group is None
+                else "Successfully added!",
+                ephemeral=True,
+            )
+        await self.run.update_embed()
 
 
 class BAPasswordModal(discord.ui.Modal):
@@ -390,6 +641,7 @@ class BAPasswordModal(discord.ui.Modal):
     async def callback(self, interaction: discord.Interaction):
         resp = interaction.response  # type: discord.InteractionResponse
         self.run.password = self.children[0].value
+        self.run.save()
         await resp.send_message("Password set.", ephemeral=True)
 
 
@@ -440,6 +692,12 @@ class BARunView(discord.ui.View):
                 style=discord.ButtonStyle.primary,
                 callback=self.get_password,
             ),
+            generate_button(
+                label="Optimize Roster",
+                custom_id=f"ba-optimize-roster-{self.run.id}",
+                style=discord.ButtonStyle.primary,
+                callback=self.optimize_roster,
+            ),
         ]
         super().__init__(*items, timeout=None)
 
@@ -485,6 +743,16 @@ class BARunView(discord.ui.View):
                     description="Try and join the support group.",
                     value="6",
                 ),
+                discord.SelectOption(
+                    label="Any Group",
+                    description="Join whichever group your role fits best.",
+                    value="-1",
+                ),
+                discord.SelectOption(
+                    label="Waitlist",
+                    description="Wait for the host to make room for your role.",
+                    value="-2",
+                ),
             ],
         )
         select.callback = types.MethodType(self.group_selection_callback, select)
@@ -496,7 +764,12 @@ class BARunView(discord.ui.View):
         group_index = int(select.values[0])
         resp = interaction.response  # type: discord.InteractionResponse
         await resp.send_message(
-            view=RoleSelectView(self.run.groups[group_index]), ephemeral=True
+            view=RoleSelectView(
+                self.run,
+                self.run.groups[group_index] if group_index >= 0 else None,
+                waitlist=group_index == -2,
+            ),
+            ephemeral=True,
         )
 
     async def set_password(
@@ -529,58 +802,49 @@ class BARunView(discord.ui.View):
         self, button: discord.ui.Button, interaction: discord.Interaction
     ):
         resp = interaction.response  # type: discord.InteractionResponse
-        group = self.run.find_group_with(interaction.user.id)
-        if group is not None:
-            group.remove_member(interaction.user.id)
-            await resp.send_message(
-                "You have been removed from the run.", ephemeral=True
-            )
-            await self.run.update_embed()
+        try:
+            async with self.run.lock:
+                group = self.run.leave(interaction.user.id)
+        except RosterError as e:
+            await resp.send_message(f"{e}", ephemeral=True)
             return
-        await resp.send_message("You are already not in the run!", ephemeral=True)
+        await resp.send_message(
+            "You have been removed from the run."
+            if group is not None
+            else "You have been removed from the waitlist.",
+            ephemeral=True,
+        )
+        await self.run.update_embed()
 
     async def claim_leader(
         self, button: discord.ui.Button, interaction: discord.Interaction
     ):
         resp = interaction.response  # type: discord.InteractionResponse
-        group = self.run.find_group_with(interaction.user.id)
-        if group is not None:
-            if group.leader is None:
-                group.leader = group.get_index(interaction.user.id)
-                await resp.send_message(
-                    "You have been assigned as group leader!", ephemeral=True
-                )
-                await self.run.update_embed()
-            else:
-                await resp.send_message(
-                    "Your group already has a leader!", ephemeral=True
-                )
-        else:
-            await resp.send_message("You are not in the run!", ephemeral=True)
+        try:
+            async with self.run.lock:
+                self.run.claim_leader(interaction.user.id)
+        except RosterError as e:
+            await resp.send_message(f"{e}", ephemeral=True)
+            return
+        await resp.send_message(
+            "You have been assigned as group leader!", ephemeral=True
+        )
+        await self.run.update_embed()
 
     async def relinquish_leader(
         self, button: discord.ui.Button, interaction: discord.Interaction
     ):
         resp = interaction.response  # type: discord.InteractionResponse
-        group = self.run.find_group_with(interaction.user.id)
-        if group is not None:
-            if (
-                group.leader == group.get_index(interaction.user.id)
-                and group.leader is not None
-            ):
-                group.leader = None
-                await resp.send_message(
-                    "You have been removed as group leader!", ephemeral=True
-                )
-                await self.run.update_embed()
-            else:
-                await resp.send_message(
-                    "You are already not the group leader, or you have been assigned"
-                    " leader by default, and cannot relinquish it.",
-                    ephemeral=True,
-                )
-        else:
-            await resp.send_message("You are not in the run!", ephemeral=True)
+        try:
+            async with self.run.lock:
+                self.run.relinquish_leader(interaction.user.id)
+        except RosterError as e:
+            await resp.send_message(f"{e}", ephemeral=True)
+            return
+        await resp.send_message(
+            "You have been removed as group leader!", ephemeral=True
+        )
+        await self.run.update_embed()
 
     async def ping_run(
         self, button: discord.ui.Button, interaction: discord.Interaction
@@ -611,3 +875,37 @@ class BARunView(discord.ui.View):
             await resp.send_message(
                 "The password is not available to you at this time.", ephemeral=True
             )
+
+    async def optimize_roster(
+        self, button: discord.ui.Button, interaction: discord.Interaction
+    ):
+        resp = interaction.response  # type: discord.InteractionResponse
+        if interaction.user.id != self.run.host_id:
+            await resp.send_message(
+                "Only the host can optimize the roster!", ephemeral=True
+            )
+            return
+        if not self.run.waitlist:
+            await resp.send_message("The waitlist is empty.", ephemeral=True)
+            return
+        async with self.run.lock:
+            result = await optimize_roster(self.run)
+            if result.placed:
+                self.run.save()
+        if not result.placed:
+            await resp.send_message(
+                "Nobody on the waitlist can be fit in, even after moving members.",
+                ephemeral=True,
+            )
+            return
+        lines = [
+            f"Moved **{member.name}** from Group {source + 1} to Group {target + 1}."
+            for member, source, target in result.moves
+        ] + [
+            f"Placed **{member.name}** ({member.role}) in Group {index + 1}."
+            for member, index in result.placed
+        ]
+        if self.run.waitlist:
+            lines.append(f"{len(self.run.waitlist)} still waiting.")
+        await resp.send_message("\n".join(lines), ephemeral=True)
+        await self.run.update_embed()
@@ -0,0 +1,71 @@
+"""Times the BA roster optimizer on synthetic, nearly full 56-player runs.
+
+Run from the repository root:
+
+    python bench/ba_optimizer_bench.py [runs] [budget]
+
+Each run is filled with random roles, each joining its best group, until
+nothing more fits, then given an 8-player waitlist. Reports the average and worst
+time per optimize and how many waitlisted players were placed.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ba_optimizer import optimize_roster
+from ba_recruiting import BAGroup, BARun
+from const import *
+from recruiting import RunMember
+
+
+ROLES = list(BARole)
+
+
+def synthetic_run(rng: random.Random) -> BARun:
+    # Only the roster is needed, not the Discord side of a run
+    run = BARun.__new__(BARun)
+    run.groups = [BAGroup(run, [], None, index) for index in range(7)]
+    run.refresh_composition()
+    next_id = 0
+    for _ in range(400):
+        role = rng.choice(ROLES)
+        index = run.best_group_for(role)
+        if index is not None:
+            next_id += 1
+            run.groups[index].add_member(RunMember(f"Member {next_id}", role, next_id))
+    run.waitlist = [
+        RunMember(f"Waiting {i}", rng.choice(ROLES), 10000 + i) for i in range(8)
+    ]
+    return run
+
+
+async def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else BA_OPTIMIZE_BUDGET
+    rng = random.Random(1)
+    total = worst = 0.0
+    placed = waiting = members = 0
+    for _ in range(runs):
+        run = synthetic_run(rng)
+        members += sum(len(group) for group in run.groups[:6])
+        waiting += len(run.waitlist)
+        started = time.perf_counter()
+        result = await optimize_roster(run, budget=budget)
+        elapsed = time.perf_counter() - started
+        total += elapsed
+        worst = max(worst, elapsed)
+        placed += len(result.placed)
+    print(
+        f"{runs} runs, {members / runs:.1f} members on average, budget {budget}:"
+        f" {total / runs * 1000:.1f} ms average, {worst * 1000:.1f} ms worst,"
+        f" placed {placed}/{waiting}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""Reports how long the bot's modules take to import.
+
+Run from the repository root:
+
+    python bench/import_time.py [module ...] [--top N] [--budget MS]
+
+Each module is imported in a fresh interpreter under `python -X importtime`,
+and the cumulative import time is printed along with the heaviest imports it
+pulled in. With --budget the script exits non-zero when any module takes
+longer than that many milliseconds, so it can guard restart times.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import *
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["utils", "registry", "verification", "ba_recruiting", "bot"]
+
+
+def import_times(module: str) -> List[Tuple[int, int, str]]:
+    # Returns (Self us, Cumulative us, Module) for every module imported
+    done = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if done.returncode != 0:
+        raise RuntimeError(done.stderr.strip().splitlines()[-1])
+    times = []
+    for line in done.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        times.append((int(own), int(cumulative), name.rstrip()))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None)
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        try:
+            times = import_times(module)
+        except RuntimeError as e:
+            print(f"{module}: failed to import, {e}")
+            over_budget = True
+            continue
+        total = next(
+            cumulative for _, cumulative, name in times if name.strip() == module
+        )
+        print(f"{module}: {total / 1000:.1f} ms")
+        heaviest = sorted(
+            (t for t in times if t[2].strip() != module), key=lambda t: -t[1]
+        )
+        for _, cumulative, name in heaviest[: args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+        if args.budget is not None and total / 1000 > args.budget:
+            over_budget = True
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Compares the streaming Lodestone parsers against the old bs4 lookups.
+
+Run from the repository root:
+
+    python bench/lodestone_parser_bench.py [repetitions]
+
+Every fixture page is parsed the way the bot used to (a full BeautifulSoup
+tree) and the way it does now, reporting CPU time and peak allocation per
+page. The bs4 half is skipped when bs4 is not installed.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lodestone_parser
+
+try:
+    import bs4
+except ImportError:
+    bs4 = None
+
+
+FIXTURES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests",
+    "fixtures",
+    "lodestone",
+)
+
+
+class Response:
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.text = text
+
+
+def soup_profile(text: str):
+    result = bs4.BeautifulSoup(text, "html.parser")
+    return (
+        result.find("p", "frame__chara__name").text,
+        result.find("p", "frame__chara__world").text,
+        str(result.find_all("div", "character__selfintroduction")[0]),
+    )
+
+
+def soup_mounts(text: str):
+    return [
+        tag["data-tooltip_href"]
+        for tag in bs4.BeautifulSoup(text, "html.parser").find_all(
+            "li", "mount__list_icon"
+        )
+    ]
+
+
+def soup_achievement(text: str):
+    return (
+        len(
+            bs4.BeautifulSoup(text, "html.parser").find_all(
+                "div", "entry__achievement__view entry__achievement__view--complete"
+            )
+        )
+        > 0
+    )
+
+
+def soup_search(text: str):
+    result = bs4.BeautifulSoup(text, "html.parser")
+    result.find("li", "btn__pager__current")
+    return [list(player.stripped_strings) for player in result.find_all("a", "entry__link")]
+
+
+PAGES = [
+    ("profile.html", soup_profile, lodestone_parser.parse_profile),
+    ("mount.html", soup_mounts, lodestone_parser.parse_mounts),
+    ("achievement_complete.html", soup_achievement, lodestone_parser.parse_achievement),
+    ("achievement_incomplete.html", soup_achievement, lodestone_parser.parse_achievement),
+    ("search.html", soup_search, lodestone_parser.parse_search_page),
+]
+
+
+def measure(parse, arg, repetitions: int):
+    started = time.process_time()
+    for _ in range(repetitions):
+        parse(arg)
+    cpu = (time.process_time() - started) / repetitions
+    tracemalloc.start()
+    parse(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    if bs4 is None:
+        print("bs4 is not installed, only the streaming parsers are measured.")
+    print(f"{'page':<28}{'size':>9}{'bs4 ms':>10}{'bs4 KiB':>10}{'new ms':>10}{'new KiB':>10}")
+    for name, soup_parse, parse in PAGES:
+        with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as page:
+            text = page.read()
+        new_cpu, new_peak = measure(parse, Response(text), repetitions)
+        if bs4 is None:
+            old = f"{'-':>10}{'-':>10}"
+        else:
+            old_cpu, old_peak = measure(soup_parse, text, repetitions)
+            old = f"{old_cpu * 1000:>10.2f}{old_peak / 1024:>10.0f}"
+        print(
+            f"{name:<28}{len(text):>9}{old}"
+            f"{new_cpu * 1000:>10.2f}{new_peak / 1024:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
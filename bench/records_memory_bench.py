@@ -0,0 +1,70 @@
+"""Measures the registry's memory per 10k users, as dicts and as records.
+
+Run from the repository root:
+
+    python bench/records_memory_bench.py [users]
+
+Builds the same synthetic registry twice, once as the plain dicts loaded
+from verification_map.json and once as VerificationRecord objects, and
+reports the memory allocated for each.
+"""
+
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from const import FFXIV_SERVERS
+from records import VerificationRecord
+
+
+def synthetic_json(users: int) -> str:
+    rng = random.Random(1)
+    worlds = sorted(FFXIV_SERVERS)
+    return json.dumps(
+        {
+            str(100000000000000000 + i): {
+                "id": 10000000 + i,
+                "name": f"Player{i} Surname{rng.randrange(10000)}",
+                "server": f"{rng.choice(worlds)} [Aether]",
+                "token": f"{rng.getrandbits(128):032x}",
+                "valid": rng.random() < 0.9,
+            }
+            for i in range(users)
+        }
+    )
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    registry = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registry
+    return size
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dump = synthetic_json(users)
+    as_dicts = measure(
+        lambda: {int(did): data for did, data in json.loads(dump).items()}
+    )
+    as_records = measure(
+        lambda: {
+            int(did): VerificationRecord.from_dict(data)
+            for did, data in json.loads(dump).items()
+        }
+    )
+    scale = 10000 / users
+    print(f"{users} users")
+    print(f"dicts:   {as_dicts / 2**20:.2f} MiB ({as_dicts * scale / 2**20:.2f} MiB per 10k)")
+    print(f"records: {as_records / 2**20:.2f} MiB ({as_records * scale / 2**20:.2f} MiB per 10k)")
+    print(f"saved:   {(as_dicts - as_records) * scale / 2**20:.2f} MiB per 10k users")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,212 +1,201 @@
-from datetime import timezone
-
 import globals
 
 import asyncio
 import ba_recruiting
-import bs4
 from const import *
 import datetime
 import discord
-import json
-import os
+from guides import GuideIndex, parse_guide
+import lodestone
+from members import MemberResolver
+from moderation import ModerationEntry, ModerationScheduler
+import parsing
+from parsing import ParsedMessage, parse_message, parse_payload
+import ratelimit
+from reaction_roles import ReactionBindings
+import reconcile
 import re
-import requests
-import secrets
-import threading
+from registry import *
+import search_index
+import storage
+import time
 from typing import *
 from utils import *
-import uuid
 from urllib.parse import urlparse, urlunparse
 from verification import *
 
 
-def known_discord_id(id: int) -> bool:
-    return globals.verification_map.get(id, None) is not None
-
-
-def get_user_token(id: int) -> str:
-    if known_discord_id(id):
-        return globals.verification_map[id]["token"]
-    else:
-        return secrets.token_urlsafe(8)
-
-
-def get_user_ffxiv_id(id: int) -> Optional[int]:
-    if known_discord_id(id):
-        return globals.verification_map[id]["id"]
-    return None
-
-
-def get_user_ffxiv_name_server(id: int) -> Optional[Tuple[str, str]]:
-    if known_discord_id(id):
-        maybe_name = globals.verification_map[id]["name"]
-        if maybe_name is None:
-            name, server = extract_name_server(globals.verification_map[id]["id"])
-            globals.verification_map[id]["name"] = name
-            globals.verification_map[id]["server"] = server
-            return name, server
-        else:
-            return (
-                globals.verification_map[id]["name"],
-                globals.verification_map[id]["server"],
-            )
-    return None
-
-
-async def register_user(did: int, name: str, server: str, cid: Optional[int] = None) -> bool:
-    search = lodestone_search(name, server) if cid is None else {
-        "id": cid,
-        "name": name,
-        "server": server,
-    }
-    if search is None:
-        return False
-    search["valid"] = False
-    search["token"] = get_user_token(did)
-    globals.verification_map[did] = search
-    return True
-
-
-async def force_register_user(did: int, fid: int, name: str, server: str):
-    globals.verification_map[did] = {
-        "id": fid,
-        "name": name,
-        "server": server,
-        "valid": False,
-        "token": get_user_token(did),
-    }
-
-
-@delayed(delay_secs=3600)
-async def backup_dbs():
-    while True:
-        with open("data/verification_map.json", "w") as dumpfile:
-            json.dump(globals.verification_map, dumpfile, indent=4)
-        with open("data/ba_run_post_map.json", "w") as dumpfile:
-            to_save = {}
-            for key in globals.ba_run_post_map.keys():
-                to_save[str(key)] = globals.ba_run_post_map[key].to_dict()
-            json.dump(to_save, dumpfile, indent=4)
-
-        await asyncio.sleep(3600)
-
-
 class PhoinixBot(discord.Bot):
     def __init__(self, *, intents: discord.Intents, **options: Any):
         self.PEBE = None  # type: discord.Guild
         self.target_channel_id = None
         self.target_dm_id = None
         # Maps Message ID -> (Emoji -> Role ID)
-        self.reaction_bindings = {}  # type: Dict[int, Dict[discord.PartialEmoji, int]]
+        self.reaction_bindings = ReactionBindings()
         # Maps Guide Name -> (Index -> Message Template)
-        self.guide_bindings = {}  # type: Dict[str, Dict[int, discord.Message]]
+        self.guides = GuideIndex()
         self.guide_lock = asyncio.Lock()
-        # Maps Message ID -> Moderation Function Event
-        self.moderated_messages = {}  # type: Dict[int, asyncio.Event]
+        self.moderation = ModerationScheduler(self.check_moderated_message)
+        self.members = MemberResolver()
+        self.reconciler = reconcile.Reconciler()
         self.first_ready = True
         self.debounce_deletion_notifications = True
         super().__init__(intents=intents, **options)
 
-    async def moderate_message(
-        self,
-        message: discord.Message,
-        check_signal: asyncio.Event,
-        default_lifetime: Optional[datetime.timedelta] = None,
-        minimum_lifetime: Optional[datetime.timedelta] = None,
-        notification_time: Optional[datetime.timedelta] = None,
-        do_notifications: bool = True,
+    async def check_moderated_message(self, entry: ModerationEntry) -> Optional[float]:
+        channel = self.get_channel(entry.channel_id)  # type: discord.TextChannel
+        try:
+            message = await channel.fetch_message(entry.message_id)
+        except discord.NotFound:
+            # Message was deleted, stop moderating it
+            self.moderation.forget(entry.message_id)
+            return None
+        except discord.Forbidden:
+            print(
+                "Bot Permissions are not set up correctly! Cannot access message"
+                f" in {channel.name} with message ID: {entry.message_id}"
+            )
+            return time.time() + MODERATION_RETRY_DELAY.total_seconds()
+        except discord.HTTPException:
+            # Failed to connect, carry on and retry later
+            return time.time() + MODERATION_RETRY_DELAY.total_seconds()
+
+        if not entry.started:
+            await message.remove_reaction(DELETING_SOON_EMOJI, self.user)
+            await message.add_reaction(MONITORING_EMOJI)
+            entry.started = True
+
+        if entry.author_id is None:
+            entry.author_id = message.author.id
+        if not entry.reconciled:
+            await self.reconcile_do_not_delete(entry, message)
+        if entry.dnd:
+            # The message is marked do not delete, wait for something to change
+            await message.remove_reaction(DELETING_SOON_EMOJI, self.user)
+            return None
+        stamps = [
+            stamp + entry.minimum_lifetime
+            for stamp in parse_message(message).timestamps
+        ]
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expiration_time = max(stamps + [message.created_at + entry.default_lifetime])
+        entry.expiration = expiration_time.timestamp()
+        if now >= expiration_time:
+            await message.delete()
+            self.moderation.forget(entry.message_id)
+            return None
+        elif (expiration_time - now) < entry.notification_time:
+            # Not quite time to delete the message, but less than a day away. Mark the message.
+            await message.add_reaction(DELETING_SOON_EMOJI)
+            author = message.author  # type: discord.Member
+            if not entry.notified:
+                dm_channel = author.dm_channel  # type: Optional[discord.DMChannel]
+                if dm_channel is None:
+                    dm_channel = await author.create_dm()
+                try:
+                    if (
+                        entry.do_notifications
+                        and not self.debounce_deletion_notifications
+                    ):
+                        await dm_channel.send(
+                            f"Your message {message.jump_url} will be deleted in"
+                            f" {generate_hammertime_timestamp(expiration_time)} unless"
+                            f" you react with {DO_NOT_DELETE_EMOJI}\nPlease only"
+                            " react if the message should not be deleted."
+                        )
+                    entry.notified = True
+                except:
+                    pass
+            return expiration_time.timestamp()
+        else:
+            # More than a day away, schedule a check for just under a day away from the expiration time
+            entry.notified = False
+            await message.add_reaction(MONITORING_EMOJI)
+            return (
+                expiration_time
+                - entry.minimum_lifetime
+                + datetime.timedelta(seconds=1)
+            ).timestamp()
+
+    async def reconcile_do_not_delete(
+        self, entry: ModerationEntry, message: discord.Message
     ):
-        if default_lifetime is None:
-            default_lifetime = DEFAULT_MESSAGE_LIFETIME
-        if minimum_lifetime is None:
-            minimum_lifetime = MIN_MESSAGE_LIFETIME
-        if notification_time is None:
-            notification_time = minimum_lifetime
-
-        await message.remove_reaction(DELETING_SOON_EMOJI, self.user)
-        await message.add_reaction(MONITORING_EMOJI)
-        notified = False
+        # Reactions made while we were away are only found by asking, once per entry
+        dnd = False
+        for reaction in message.reactions:
+            if reaction.emoji == DO_NOT_DELETE_EMOJI:
+                async for user in reaction.users():
+                    if user.id == message.author.id:
+                        dnd = True
+                        break
+                break
+        # A reaction event during the walk is newer than what the walk saw
+        if not entry.reconciled:
+            entry.dnd = dnd
+            entry.reconciled = True
+
+    @staticmethod
+    def make_moderation_entry(
+        message_id: int, channel_id: int, author_id: Optional[int] = None
+    ) -> ModerationEntry:
+        return ModerationEntry(
+            message_id,
+            channel_id,
+            author_id,
+            default_lifetime=LIFETIME_MAP.get(channel_id, DEFAULT_MESSAGE_LIFETIME),
+            do_notifications=DO_NOTIFICATIONS_MAP.get(channel_id, True),
+        )
+
+    def moderate_message(self, message: discord.Message):
+        if message.id not in self.moderation:
+            entry = self.make_moderation_entry(
+                message.id, message.channel.id, message.author.id
+            )
+            # Without the reaction there is nothing to ask about
+            entry.reconciled = all(
+                reaction.emoji != DO_NOT_DELETE_EMOJI for reaction in message.reactions
+            )
+            self.moderation.watch(entry)
+
+    @delayed(delay_secs=MODERATION_CHECKPOINT_INTERVAL.total_seconds())
+    async def checkpoint_moderation(self):
         while True:
-            try:
-                message = await message.channel.fetch_message(message.id)
-            except discord.NotFound:
-                # Message was deleted, stop moderating it
-                return
-            except discord.Forbidden:
-                print(
-                    "Bot Permissions are not set up correctly! Cannot access message"
-                    f" in {message.channel.name} with message ID: {message.id} by"
-                    f" {message.author.display_name}"
-                )
-            except discord.HTTPException:
-                # Failed to connect, carry on and retry later
-                pass
-            marked_dnd = False
-            for reaction in message.reactions:
-                if reaction.emoji == DO_NOT_DELETE_EMOJI and message.author in [
-                    user async for user in reaction.users()
-                ]:
-                    await message.remove_reaction(DELETING_SOON_EMOJI, self.user)
-                    marked_dnd = True
-                    break
-            if marked_dnd:
-                # The message is marked do not delete
-                await wait_and_clear(check_signal)
-                continue
-            stamps = [
-                stamp + minimum_lifetime
-                for stamp in extract_hammertime_timestamps(message.content)
-            ]
-            now = datetime.datetime.now(datetime.timezone.utc)
-            expiration_time = max(stamps + [message.created_at + default_lifetime])
-            if now >= expiration_time:
-                await message.delete()
-            elif (expiration_time - now) < notification_time:
-                # Not quite time to delete the message, but less than a day away. Mark the message.
-                await message.add_reaction(DELETING_SOON_EMOJI)
-                author = message.author  # type: discord.Member
-                if not notified:
-                    dm_channel = author.dm_channel  # type: Optional[discord.DMChannel]
-                    if dm_channel is None:
-                        dm_channel = await author.create_dm()
-                    try:
-                        if (
-                            do_notifications
-                            and not self.debounce_deletion_notifications
-                        ):
-                            await dm_channel.send(
-                                f"Your message {message.jump_url} will be deleted in"
-                                f" {generate_hammertime_timestamp(expiration_time)} unless"
-                                f" you react with {DO_NOT_DELETE_EMOJI}\nPlease only"
-                                " react if the message should not be deleted."
-                            )
-                        notified = True
-                    except:
-                        pass
-                schedule_task(
-                    trigger_later(check_signal, (expiration_time - now).total_seconds())
-                )
-                await wait_and_clear(check_signal)
-            else:
-                # More than a day away, schedule a check for just under a day away from the expiration time
-                notified = False
-                await message.add_reaction(MONITORING_EMOJI)
-                schedule_task(
-                    trigger_later(
-                        check_signal,
-                        (
-                            expiration_time
-                            - now
-                            - minimum_lifetime
-                            + datetime.timedelta(seconds=1)
-                        ).total_seconds(),
-                    )
-                )
-                await wait_and_clear(check_signal)
+            self.moderation.save(MODERATION_STATE_PATH)
+            await asyncio.sleep(MODERATION_CHECKPOINT_INTERVAL.total_seconds())
+
+    async def restore_moderation(self):
+        checkpoint = self.moderation.load(
+            MODERATION_STATE_PATH, self.make_moderation_entry
+        )
+        # Only messages posted since the checkpoint are unknown, older ones are checked when due
+        history_start = (
+            GRACE_TIME
+            if checkpoint is None
+            else datetime.datetime.fromtimestamp(checkpoint, datetime.timezone.utc)
+            - MODERATION_CHECKPOINT_INTERVAL
+        )
+        await asyncio.gather(
+            *(
+                self.restore_moderated_channel(moderated_channel_id, history_start)
+                for moderated_channel_id in MODERATED_CHANNEL_IDS
+            )
+        )
+
+    async def restore_moderated_channel(
+        self, moderated_channel_id: int, history_start: datetime.datetime
+    ):
+        channel = self.get_channel(moderated_channel_id)  # type: discord.TextChannel
+        if channel is None:
+            print(
+                f"Failed to fetch history for channel with id: {moderated_channel_id}"
+            )
+            return
+        async for moderated_message in channel.history(after=history_start):
+            if moderated_message.author.id != self.user.id:
+                self.moderate_message(moderated_message)
 
     async def delete_recruitment_post_and_related(self, rpost: discord.Message):
-        times = extract_hammertime_timestamps(rpost.content)
+        times = parse_message(rpost).timestamps
         if len(times) == 0:
             # No timestamps, just delete the post
             await rpost.delete()
@@ -219,10 +208,13 @@ class PhoinixBot(discord.Bot):
                     reason="Recruitment post cleanup",
                 )
 
-    async def validate_message_tags(self, m: discord.Message, role_ids: Set[int]):
-        member = await self.PEBE.fetch_member(m.author.id)
+    async def validate_message_tags(
+        self, m: discord.Message, role_ids: Collection[int]
+    ):
+        member = await self.members.resolve(m.author.id)
         if member is None:
             print(f"FUCKED ID: {m.author.id}")
+            return
         else:
             for role in member.roles:
                 if role.id in [
@@ -235,12 +227,7 @@ class PhoinixBot(discord.Bot):
         if member.bot:
             return
 
-        bad_message = True
-        for role_mention in m.role_mentions:
-            if role_mention.id in role_ids:
-                bad_message = False
-                break
-        if bad_message:
+        if parse_message(m).role_mentions.isdisjoint(role_ids):
             roles = "\n".join(self.PEBE.get_role(role_id).name for role_id in role_ids)
             schedule_task(
                 m.reply(
@@ -254,102 +241,118 @@ class PhoinixBot(discord.Bot):
             schedule_task(m.delete(delay=30))
 
     async def fetch_member(self, id: int) -> Optional[discord.Member]:
-        try:
-            return await self.PEBE.fetch_member(id)
-        except discord.Forbidden:
-            print("Insufficient permission to read members! Please fix :(")
-        except discord.NotFound:
+        member = await self.members.resolve(id)
+        if member is None:
             print(f"User with ID {id} could not be found! Did they leave?")
-        except discord.HTTPException:
-            pass
-        return None
+        return member
 
     async def compute_reaction_bindings(self):
+        # Full rescan, only needed when there are no saved bindings to start from
         message_sets = [
             self.PEBE.get_channel(CHANNEL_ID_MAP["roles"]).history(),
             self.PEBE.get_channel(CHANNEL_ID_MAP["rules"]).history(),
         ]
-        self.reaction_bindings = {}
+        self.reaction_bindings.clear()
         for messages in message_sets:
             async for message in messages:
-                try:
-                    author = await self.PEBE.fetch_member(message.author.id)
-                    if author.get_role(ROLE_ID_MAP["Admin"]) is not None:
-                        self.reaction_bindings[message.id] = {}
-                        for emoji, role_id in extract_react_bindings(message.content):
-                            self.reaction_bindings[message.id][emoji] = role_id
-                            try:
-                                await message.add_reaction(emoji)
-                            except:
-                                pass  # Nobody cares if this fails
-                except discord.NotFound:
-                    print(
-                        "Whoever posted the role react message is gone! Someone"
-                        " repost it!"
-                    )
+                await self.bind_reactions(
+                    message.channel.id,
+                    message.id,
+                    message.author.id,
+                    parse_message(message),
+                )
+        self.reaction_bindings.save()
+
+    async def bind_reactions(
+        self, channel_id: int, message_id: int, author_id: int, parsed: ParsedMessage
+    ):
+        author = await self.members.resolve(author_id)
+        if author is None:
+            print("Whoever posted the role react message is gone! Someone repost it!")
+            self.reaction_bindings.remove(message_id)
+            return
+        if author.get_role(ROLE_ID_MAP["Admin"]) is None:
+            self.reaction_bindings.remove(message_id)
+            return
+        message = self.get_channel(channel_id).get_partial_message(message_id)
+        for emoji in self.reaction_bindings.update(message_id, parsed):
+            try:
+                await message.add_reaction(emoji)
+            except:
+                pass  # Nobody cares if this fails
 
     async def compute_guide_bindings(self):
+        # Full rescan, only needed when there is no saved index to start from
         guides = self.get_channel(CHANNEL_ID_MAP["guides"])  # type: discord.TextChannel
-        guide_messages = guides.history()
-        bindings = {}  # type: Dict[str, Dict[int, discord.Message]]
-
-        async for message in guide_messages:
-            message = message  # type: discord.Message
-            firstline = message.content.split("\n")[0]
-            form = re.match("(\S+)\s+(\d+)\s*", firstline)
-            if form and len(message.attachments) > 0:
-                name = form[1]
-                seq = int(form[2])
-                bindings[name] = bindings.get(name, {}) | {seq: message}
-                for reaction in message.reactions:
-                    if reaction.emoji == "❎" and reaction.me:
-                        await message.remove_reaction(
-                            "❎", await self.fetch_member(self.user.id)
-                        )
-                        break
-            else:
-                await message.add_reaction("❎")
-        for guide in bindings.values():
-            for img in guide.values():
-                print(f"Guide URL {img.attachments[0].url}")
         async with self.guide_lock:
-            self.guide_bindings = bindings
-
-    async def delete_untagged_messages(self):
-        ba = self.get_channel(CHANNEL_ID_MAP["ba-recruiting"])
-        drs = self.get_channel(CHANNEL_ID_MAP["drs-recruiting"])
-        drs_oce = self.get_channel(CHANNEL_ID_MAP["drs-oce-recruiting"])
+            self.guides.clear()
+            # Oldest first, so the newest message for a position wins
+            async for message in guides.history(limit=None, oldest_first=True):
+                message = message  # type: discord.Message
+                await self.index_guide(
+                    message.id,
+                    parse_message(message),
+                    [attachment.url for attachment in message.attachments],
+                    marked=any(
+                        reaction.emoji == "❎" and reaction.me
+                        for reaction in message.reactions
+                    ),
+                )
+            self.guides.save()
 
-        ba_messages = ba.history(limit=100, after=GRACE_TIME)
-        drs_messages = drs.history(limit=100, after=GRACE_TIME)
-        drs_oce_messages = drs_oce.history(limit=100, after=GRACE_TIME)
+    async def index_guide(
+        self,
+        message_id: int,
+        parsed: ParsedMessage,
+        attachment_urls: List[str],
+        marked: Optional[bool] = None,
+    ):
+        # marked says whether we have reacted ❎ to the message, None if unknown
+        message = self.get_channel(CHANNEL_ID_MAP["guides"]).get_partial_message(
+            message_id
+        )
+        found = parse_guide(parsed, attachment_urls)
+        if found is None:
+            self.guides.remove(message_id)
+            if not marked:
+                await message.add_reaction("❎")
+            return
+        self.guides.update(message_id, *found)
+        if marked is not False:
+            try:
+                await message.remove_reaction("❎", self.user)
+            except discord.HTTPException:
+                pass
 
-        async for message in ba_messages:
-            # This is dumb and only here for autocomplete
-            m = message  # type: discord.Message
-            await validate_message_tags(
-                m,
-                await self.fetch_member(m.author.id),
+    async def delete_untagged_messages(self):
+        # Each channel is its own history walk, so they run side by side
+        await asyncio.gather(
+            self.delete_untagged_messages_in(
+                CHANNEL_ID_MAP["ba-recruiting"],
                 [ROLE_ID_MAP["BA Learning"], ROLE_ID_MAP["BA Reclear"]],
-            )
-
-        async for message in drs_messages:
-            # Same thing here
-            m = message  # type: discord.Message
-            await validate_message_tags(
-                m,
-                await self.fetch_member(m.author.id),
+            ),
+            self.delete_untagged_messages_in(
+                CHANNEL_ID_MAP["drs-recruiting"],
                 [ROLE_ID_MAP["DRS Learning"], ROLE_ID_MAP["DRS Reclear"]],
-            )
+            ),
+            self.delete_untagged_messages_in(
+                CHANNEL_ID_MAP["drs-oce-recruiting"],
+                [ROLE_ID_MAP["DRS Learning"], ROLE_ID_MAP["DRS Reclear"]],
+            ),
+        )
 
-        async for message in drs_oce_messages:
-            # You know the drill
+    async def delete_untagged_messages_in(self, channel_id: int, role_ids: List[int]):
+        channel = self.get_channel(channel_id)
+        async for message in channel.history(limit=100, after=GRACE_TIME):
+            # This is dumb and only here for autocomplete
             m = message  # type: discord.Message
-            await validate_message_tags(
-                m,
-                await self.fetch_member(m.author.id),
-                [ROLE_ID_MAP["DRS Learning"], ROLE_ID_MAP["DRS Reclear"]],
-            )
+            await self.validate_message_tags(m, role_ids)
+
+    async def close(self):
+        if not self.first_ready:
+            self.moderation.save(MODERATION_STATE_PATH)
+        await lodestone.client.close()
+        await super().close()
 
     @delayed(delay_secs=30)
     def unset_deletion_notification_debounce(self):
@@ -358,49 +361,46 @@ class PhoinixBot(discord.Bot):
     async def on_ready(self):
         print("Nya")
         self.PEBE = self.get_guild(1028110201968132116)
+        self.members.bind(self.PEBE)
+        self.reconciler.bind(self.PEBE)
         print(self.PEBE)
-        await self.delete_untagged_messages()
-        await self.compute_reaction_bindings()
-        await self.compute_guide_bindings()
-        if self.first_ready:
-            load_verification_map()
-            load_ba_run_map(self)
-            print("Adding verification view")
-            self.add_view(VerificationView(bot))
-            for key in globals.ba_run_post_map.keys():
-                run = globals.ba_run_post_map[key]
-                self.add_view(
-                    ba_recruiting.BARunView(run), message_id=run.roster_embed_id
-                )
-            schedule_task(refresh_calls_loop())
-            for moderated_channel_id in MODERATED_CHANNEL_IDS:
-                channel = self.get_channel(
-                    moderated_channel_id
-                )  # type: discord.TextChannel
-                if channel is None:
-                    print(
-                        f"Failed to fetch history for channel with id: {moderated_channel_id}"
+        with timed("Startup"):
+            stages = [run_stage("Untagged post sweep", self.delete_untagged_messages())]
+            if self.first_ready:
+                # Local loads and views first, so buttons work while the scans run
+                with timed("Loading users"):
+                    load_verification_map()
+                with timed("Loading BA runs"):
+                    load_ba_run_map(self)
+                print("Adding verification view")
+                self.add_view(VerificationView(bot))
+                for key in globals.ba_run_post_map.keys():
+                    run = globals.ba_run_post_map[key]
+                    self.add_view(
+                        ba_recruiting.BARunView(run), message_id=run.roster_embed_id
                     )
-                    continue
-                async for moderated_message in channel.history(after=GRACE_TIME):
-                    if moderated_message.author.id != self.user.id:
-                        listener_event = asyncio.Event()
-                        self.moderated_messages[moderated_message.id] = listener_event
-                        schedule_task(
-                            self.moderate_message(
-                                moderated_message,
-                                listener_event,
-                                default_lifetime=LIFETIME_MAP.get(
-                                    moderated_channel_id, DEFAULT_MESSAGE_LIFETIME
-                                ),
-                                do_notifications=DO_NOTIFICATIONS_MAP.get(
-                                    moderated_channel_id, True
-                                ),
-                            )
+                self.moderation.start()
+                name_sweeper.start()
+                if not self.reaction_bindings.load():
+                    stages.append(
+                        run_stage(
+                            "Reaction binding scan", self.compute_reaction_bindings()
                         )
+                    )
+                if not self.guides.load():
+                    stages.append(
+                        run_stage("Guide scan", self.compute_guide_bindings())
+                    )
+                stages.append(
+                    run_stage("Moderation restore", self.restore_moderation())
+                )
+            for stage in await asyncio.gather(*stages, return_exceptions=True):
+                if isinstance(stage, Exception):
+                    print(f"Startup stage failed: {stage!r}")
+        if self.first_ready:
             self.first_ready = False
             schedule_task(self.unset_deletion_notification_debounce())
-            schedule_task(backup_dbs())
+            schedule_task(self.checkpoint_moderation())
 
     async def on_message(self, message: discord.Message):
         id = message.channel.id
@@ -409,8 +409,11 @@ class PhoinixBot(discord.Bot):
 
         if id == CHANNEL_ID_MAP["command"]:
             await self.parse_console_command(message.content)
-        elif id == CHANNEL_ID_MAP["roles"]:
-            await self.compute_reaction_bindings()
+        elif id in REACTION_BINDING_CHANNEL_IDS:
+            await self.bind_reactions(
+                id, message.id, message.author.id, parse_message(message)
+            )
+            self.reaction_bindings.save()
         elif id == 975557259893555271:
             print(message.content)
         elif id == CHANNEL_ID_MAP["na-drs-schedule"]:
@@ -421,18 +424,17 @@ class PhoinixBot(discord.Bot):
                     schedule_task(message.delete(reason="Not a foray server"))
         elif id == CHANNEL_ID_MAP["death"]:
             await self.handle_death_message(message)
+        elif id == CHANNEL_ID_MAP["guides"]:
+            await self.index_guide(
+                message.id,
+                parse_message(message),
+                [attachment.url for attachment in message.attachments],
+                marked=False,
+            )
+            self.guides.save()
 
         if id in MODERATED_CHANNEL_IDS and message.author.id != self.user.id:
-            listener_event = asyncio.Event()
-            self.moderated_messages[message.id] = listener_event
-            schedule_task(
-                self.moderate_message(
-                    message,
-                    listener_event,
-                    default_lifetime=LIFETIME_MAP.get(id, DEFAULT_MESSAGE_LIFETIME),
-                    do_notifications=DO_NOTIFICATIONS_MAP.get(id, True),
-                )
-            )
+            self.moderate_message(message)
 
     async def handle_death_message(self, message: discord.Message):
         if message.author.bot:
@@ -444,7 +446,7 @@ class PhoinixBot(discord.Bot):
                 )
             return
         
-        member = await self.PEBE.fetch_member(message.author.id)
+        member = await self.members.resolve(message.author.id)
         if member is not None and ROLE_ID_MAP["Admin"] in [role.id for role in member.roles]:
             await message.reply("Stop talking in here")
             return
@@ -459,33 +461,48 @@ class PhoinixBot(discord.Bot):
         )
 
     async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
-        if payload.channel_id == CHANNEL_ID_MAP["roles"]:
-            await self.compute_reaction_bindings()
+        # Parsed once here, every path below shares the result
+        parsed = parse_payload(payload)
+        if payload.channel_id in REACTION_BINDING_CHANNEL_IDS:
+            # Embed-only updates come without content, those never change bindings
+            if parsed is not None and "author" in payload.data:
+                await self.bind_reactions(
+                    payload.channel_id,
+                    payload.message_id,
+                    int(payload.data["author"]["id"]),
+                    parsed,
+                )
+                self.reaction_bindings.save()
         elif payload.channel_id == CHANNEL_ID_MAP["guides"]:
-            await self.compute_guide_bindings()
+            if parsed is not None and "attachments" in payload.data:
+                await self.index_guide(
+                    payload.message_id,
+                    parsed,
+                    [attachment["url"] for attachment in payload.data["attachments"]],
+                )
+                self.guides.save()
 
-        if (
-            payload.channel_id in MODERATED_CHANNEL_IDS
-            and payload.message_id in self.moderated_messages
-        ):
-            self.moderated_messages[payload.message_id].set()
+        if payload.channel_id in MODERATED_CHANNEL_IDS:
+            self.moderation.reschedule(payload.message_id)
 
         if (
             payload.channel_id in BA_RECRUITING_CHANNELS
             and payload.message_id in globals.ba_run_post_map
         ):
-            chan = self.get_channel(payload.channel_id)  # type: discord.TextChannel
-            msg = await chan.fetch_message(payload.message_id)
+            if parsed is None:
+                chan = self.get_channel(payload.channel_id)  # type: discord.TextChannel
+                parsed = parse_message(await chan.fetch_message(payload.message_id))
             run = globals.ba_run_post_map[payload.message_id]
-            newtimestamps = extract_hammertime_timestamps(msg.content)
+            newtimestamps = parsed.timestamps
             if len(newtimestamps) > 0:
                 run.run_time = max(newtimestamps)
+                run.save()
                 run.signal.set()
 
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         if payload.user_id == self.user.id:
             return
-        message_bindings = self.reaction_bindings.get(payload.message_id, None)
+        message_bindings = self.reaction_bindings.get(payload.message_id)
         if message_bindings is not None:
             role_id = message_bindings.get(payload.emoji, None)
             if role_id is not None:
@@ -495,61 +512,68 @@ class PhoinixBot(discord.Bot):
 
         if (
             payload.channel_id in MODERATED_CHANNEL_IDS
-            and payload.message_id in self.moderated_messages
+            and payload.emoji == DO_NOT_DELETE_EMOJI
         ):
-            self.moderated_messages[payload.message_id].set()
+            self.moderation.set_dnd(payload.message_id, payload.user_id, True)
 
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
         if payload.user_id == self.user.id:
             return
-        message_bindings = self.reaction_bindings.get(payload.message_id, None)
+        message_bindings = self.reaction_bindings.get(payload.message_id)
         if message_bindings is not None:
             role_id = message_bindings.get(payload.emoji, None)
             if role_id is not None:
-                try:
-                    member = await self.PEBE.fetch_member(payload.user_id)
-                    await member.remove_roles(
-                        discord.Object(role_id), reason="Reaction"
-                    )
-                except discord.NotFound:
-                    pass
-                except discord.HTTPException:
-                    pass
+                member = await self.members.resolve(payload.user_id)
+                if member is not None:
+                    try:
+                        await member.remove_roles(
+                            discord.Object(role_id), reason="Reaction"
+                        )
+                    except discord.HTTPException:
+                        pass
 
         if (
             payload.channel_id in MODERATED_CHANNEL_IDS
-            and payload.message_id in self.moderated_messages
+            and payload.emoji == DO_NOT_DELETE_EMOJI
         ):
-            self.moderated_messages[payload.message_id].set()
+            self.moderation.set_dnd(payload.message_id, payload.user_id, False)
 
     async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        parsing.parser.forget(payload.message_id)
+        if payload.channel_id in REACTION_BINDING_CHANNEL_IDS:
+            if self.reaction_bindings.remove(payload.message_id):
+                self.reaction_bindings.save()
+
         if payload.channel_id == CHANNEL_ID_MAP["guides"]:
-            await self.compute_guide_bindings()
+            if self.guides.remove(payload.message_id):
+                self.guides.save()
 
-        if (
-            payload.channel_id in MODERATED_CHANNEL_IDS
-            and payload.message_id in self.moderated_messages
-        ):
-            # This has to be done to clear the message moderation coroutine
-            self.moderated_messages[payload.message_id].set()
-            self.moderated_messages.pop(payload.message_id)
+        if payload.channel_id in MODERATED_CHANNEL_IDS:
+            self.moderation.forget(payload.message_id)
 
         if (
             payload.channel_id in BA_RECRUITING_CHANNELS
             and payload.message_id in globals.ba_run_post_map
         ):
             del globals.ba_run_post_map[payload.message_id]
+            storage.database.delete_ba_run(payload.message_id)
 
-    async def fix_name(self, member: discord.Member):
+    @staticmethod
+    def desired_nick(member: discord.Member) -> Optional[str]:
         nspair = get_user_ffxiv_name_server(member.id)
         if nspair is not None:
             name, _ = nspair
             first, _ = name.split(" ")  # type: str
             mname = member.display_name
             if mname.startswith(first) or mname.lower().startswith(first.lower()[:3]):
-                print(f"Skipping name fix for {mname} with first {first}")
-                return
-            await member.edit(nick=nspair[:32])
+                return None
+            return name[:32]
+        return None
+
+    async def fix_name(self, member: discord.Member):
+        nick = self.desired_nick(member)
+        if nick is not None:
+            await member.edit(nick=nick)
 
     async def parse_console_command(self, command):
         if command.startswith("send"):
@@ -560,44 +584,37 @@ class PhoinixBot(discord.Bot):
             except:
                 pass
         elif command.startswith("save"):
-            with open("data/verification_map.json", "w") as dumpfile:
-                json.dump(globals.verification_map, dumpfile, indent=4)
-            with open("data/ba_run_post_map.json", "w") as dumpfile:
-                to_save = {}
-                for key in globals.ba_run_post_map.keys():
-                    to_save[str(key)] = globals.ba_run_post_map[key].to_dict()
-                json.dump(to_save, dumpfile, indent=4)
+            storage.database.checkpoint()
+            storage.database.backup(STORAGE_BACKUP_PATH)
         elif command.startswith("mark"):
-            for member in self.PEBE.members:
-                roles = [role.id for role in member.roles]
-                if len(roles) == 2 and ROLE_ID_MAP["Not Verified"] in roles:
-                    await member.remove_roles(
-                        discord.Object(ROLE_ID_MAP["Not Verified"])
-                    )
-                elif (
-                    len(roles) > 1
-                    and ROLE_ID_MAP["Member"] not in roles
-                    and ROLE_ID_MAP["Not Verified"] not in roles
-                ):
-                    await member.add_roles(discord.Object(ROLE_ID_MAP["Not Verified"]))
+            await self.reconciler.run(
+                "mark",
+                reconcile.plan_mark(self.PEBE.members),
+                dry_run=command.endswith("dry"),
+            )
         elif command.startswith("shutdown"):
             exit(0)
         elif command.startswith("fixnames"):
-            for member in self.PEBE.members:
-                try:
-                    await self.fix_name(member)
-                except discord.Forbidden:
-                    print(
-                        f"Could not update {member.display_name}, ask them to fix it"
-                        " themself!"
-                    )
+            await self.reconciler.run(
+                "fixnames",
+                reconcile.plan_fixnames(self.PEBE.members, self.desired_nick),
+                dry_run=command.endswith("dry"),
+            )
         elif command.startswith("purge"):
-            for member in self.PEBE.members:
-                if any(role.id == ROLE_ID_MAP["Not Verified"] for role in member.roles):
-                    try:
-                        await member.edit(roles=[])
-                    except discord.Forbidden:
-                        print(f"Tried to purge {member.display_name} but couldn't")
+            await self.reconciler.run(
+                "purge",
+                reconcile.plan_purge(self.PEBE.members),
+                dry_run=command.endswith("dry"),
+            )
+        elif command.startswith("rebind"):
+            await self.compute_reaction_bindings()
+        elif command.startswith("reindexguides"):
+            await self.compute_guide_bindings()
+        elif command.startswith("reconcile"):
+            if command.endswith("resume"):
+                await self.reconciler.resume()
+            else:
+                print(self.reconciler.status())
         elif command.startswith("target"):
             try:
                 self.target_dm_id = int(command[7:])
@@ -638,10 +655,17 @@ async def whois_user_command(ctx: discord.ApplicationContext, member: discord.Me
     if known_discord_id(member.id):
         warning = (
             ""
-            if globals.verification_map[member.id]["valid"]
+            if globals.verification_map[member.id].valid
             else "WARNING [POTENTIALLY INVALID NAME]: "
         )
-        name, server = get_user_ffxiv_name_server(member.id)
+        nspair = get_user_ffxiv_name_server(member.id)
+        if nspair is None:
+            await ctx.response.send_message(
+                "That user's name has not been fetched yet, try again shortly.",
+                ephemeral=True,
+            )
+            return
+        name, server = nspair
         await ctx.response.send_message(f"{warning}{name} @ {server}", ephemeral=True)
     else:
         await ctx.response.send_message("That user is not registered.", ephemeral=True)
@@ -654,7 +678,7 @@ async def register_ba_recruiting(
     if message.channel.id in BA_RECRUITING_CHANNELS:
         author = message.author  # type: discord.Member
         if message.author.id == ctx.author.id:
-            timestamps = extract_hammertime_timestamps(message.content)
+            timestamps = parse_message(message).timestamps
             if len(timestamps) == 0:
                 await ctx.response.send_message(
                     "Message must have a timestamp, such as one generated from"
@@ -678,7 +702,7 @@ async def register_ba_recruiting(
                     channel_id=message.channel.id,
                     bot=bot,
                     roster_embed_id=roster_message.id,
-                    host=globals.verification_map[author.id]["name"],
+                    host=globals.verification_map[author.id].name,
                     host_id=message.author.id,
                     icon=author.display_avatar.url,
                     password=None,
@@ -686,8 +710,10 @@ async def register_ba_recruiting(
                 )
 
                 globals.ba_run_post_map[message.id] = run
+                run.save()
                 view = ba_recruiting.BARunView(run)
                 await roster_message.edit(content="", view=view)
+                run.view_sent = True
                 bot.add_view(view=view, message_id=roster_message.id)
                 await run.update_embed()
                 await ctx.send_followup("Done!", ephemeral=True)
@@ -715,21 +741,19 @@ async def search(
         return
     finds = []  # type: List[Tuple[str, str, discord.Member]]
     await ctx.response.defer(ephemeral=True)
-    foundcount = 0
-    for did in globals.verification_map:
+    matches = search_index.names.search(regex, server)[:MAX_SEARCH_LOOKUPS]
+    members = await bot.members.resolve_many(did for did, _, _ in matches)
+    for did, name, fserver in matches:
         warning = (
             ""
-            if globals.verification_map[did]["valid"]
+            if globals.verification_map[did].valid
             else "WARNING [POTENTIALLY INVALID NAME]: "
         )
-        if foundcount == MAX_SEARCH_VALUES:
+        if len(finds) == MAX_SEARCH_VALUES:
             break
-        name, fserver = get_user_ffxiv_name_server(did)
-        if regex.search(name) is not None and (server is None or server in fserver):
-            fmember = await bot.fetch_member(did)
-            if fmember:
-                finds.append((warning + name, fserver, fmember))
-                foundcount += 1
+        fmember = members[did]
+        if fmember:
+            finds.append((warning + name, fserver, fmember))
     if len(finds) == 0:
         await ctx.send_followup("Did not find anyone.", ephemeral=True)
     else:
@@ -759,27 +783,31 @@ async def register(
         or member.get_role(ROLE_ID_MAP["Moderator"])
         or member.get_role(ROLE_ID_MAP["Admin"])
     ):
-        if re.match("\S+", name):
+        if parsing.GUIDE_NAME.match(name):
             name = name.lower()
             await ctx.defer(ephemeral=True)
             async with bot.guide_lock:
-                if name in bot.guide_bindings:
-                    if position in bot.guide_bindings[name]:
-                        achan = bot.get_channel(
-                            CHANNEL_ID_MAP["guides-archive"]
-                        )  # type: discord.TextChannel
-                        await achan.send(
-                            file=await bot.guide_bindings[name][position]
-                            .attachments[0]
-                            .to_file()
-                        )
-                        await bot.guide_bindings[name][position].delete()
                 gchan = bot.get_channel(
                     CHANNEL_ID_MAP["guides"]
                 )  # type: discord.TextChannel
-                await gchan.send(f"{name} {position}", file=await image.to_file())
+                existing = bot.guides.entry(name, position)
+                if existing is not None:
+                    achan = bot.get_channel(
+                        CHANNEL_ID_MAP["guides-archive"]
+                    )  # type: discord.TextChannel
+                    old = await gchan.fetch_message(existing[0])
+                    await achan.send(file=await old.attachments[0].to_file())
+                    await old.delete()
+                    bot.guides.remove(old.id)
+                sent = await gchan.send(f"{name} {position}", file=await image.to_file())
+                await bot.index_guide(
+                    sent.id,
+                    parse_message(sent),
+                    [attachment.url for attachment in sent.attachments],
+                    marked=False,
+                )
+                bot.guides.save()
             await ctx.send_followup("Done!", ephemeral=True)
-            await bot.compute_guide_bindings()
         else:
             await ctx.response.send_message(
                 "Name must not contain spaces.", ephemeral=True
@@ -790,36 +818,39 @@ async def register(
         )
 
 
+async def complete_guide_name(ctx: discord.AutocompleteContext) -> List[str]:
+    return bot.guides.complete(ctx.value.lower())
+
+
 @bot.slash_command(
     description="Get a guide that has been registered with the register command"
 )
-async def guide(ctx: discord.ApplicationContext, name: str):
+async def guide(
+    ctx: discord.ApplicationContext,
+    name: discord.Option(str, autocomplete=complete_guide_name),
+):
     name = name.lower()
     if "@" in name:
         await ctx.respond("SHAME UPON YOU")
         return
-    if name in bot.guide_bindings:
-        async with bot.guide_lock:
-            first_response = True
-            guide_seq = [
-                bot.guide_bindings[name][index].attachments[0].url
-                for index in sorted(bot.guide_bindings[name].keys())
-            ]
-
-            def build_embed(url: str) -> discord.Embed:
-                url = urlunparse(urlparse(url)._replace(query=None))
-                print(f"Building embed with url: {url}")
-                embed = discord.Embed(url=url)
-                embed.set_image(url=url)
-                return embed
-
-            for index in range(0, len(guide_seq), 10):
-                embeds = [build_embed(url) for url in guide_seq[index : index + 10]]
-                if first_response:
-                    await ctx.send_response(embeds=embeds)
-                    first_response = False
-                else:
-                    await ctx.send_followup(embeds=embeds)
+    guide_seq = bot.guides.urls(name)
+    if guide_seq is not None:
+        first_response = True
+
+        def build_embed(url: str) -> discord.Embed:
+            url = urlunparse(urlparse(url)._replace(query=None))
+            print(f"Building embed with url: {url}")
+            embed = discord.Embed(url=url)
+            embed.set_image(url=url)
+            return embed
+
+        for index in range(0, len(guide_seq), 10):
+            embeds = [build_embed(url) for url in guide_seq[index : index + 10]]
+            if first_response:
+                await ctx.send_response(embeds=embeds)
+                first_response = False
+            else:
+                await ctx.send_followup(embeds=embeds)
     else:
         await ctx.send_response(f"No guide exists with the name: {name}")
 
@@ -828,10 +859,7 @@ async def guide(ctx: discord.ApplicationContext, name: str):
     description="Get a list of guides",
 )
 async def listguides(ctx: discord.ApplicationContext):
-    async with bot.guide_lock:
-        await ctx.respond(
-            "List of guides:\n" + "\n".join(bot.guide_bindings), ephemeral=True
-        )
+    await ctx.respond("List of guides:\n" + "\n".join(bot.guides), ephemeral=True)
 
 
 @bot.slash_command(
@@ -861,7 +889,10 @@ async def botinfo(
     author = ctx.author  # type: discord.Member
     if ROLE_ID_MAP["Admin"] in set(role.id for role in author.roles):
         await ctx.respond(
-            f"There are {len(asyncio.all_tasks())} running.\nThere are {len(globals.verification_map)} users registered.\n",
+            f"There are {len(asyncio.all_tasks())} running.\nThere are {len(globals.verification_map)} users registered.\n"
+            f"Name sweep: {name_sweeper.checked} checked, {name_sweeper.changed} changed,"
+            f" {name_sweeper.queue.qsize()} queued.\n"
+            f"Outbound rate limits:\n{ratelimit.limiter.report()}",
             ephemeral=True,
         )
     else:
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from const import *
+import lodestone
+from lodestone_parser import SearchPage, parse_search_page
+import time
+from typing import *
+
+
+class CharacterSearch:
+    def __init__(
+        self,
+        max_pages: int = LODESTONE_SEARCH_MAX_PAGES,
+        found_ttl: float = LODESTONE_SEARCH_FOUND_TTL,
+        missing_ttl: float = LODESTONE_SEARCH_MISSING_TTL,
+    ):
+        self.max_pages = max_pages
+        self.found_ttl = found_ttl
+        self.missing_ttl = missing_ttl
+        # Maps (Name, Server) -> (Expiry, Result)
+        self.memo = (
+            {}
+        )  # type: Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, Union[str, int]]]]]
+        self.in_flight = {}  # type: Dict[Tuple[str, str], asyncio.Task]
+
+    async def search(
+        self, name: str, server: str
+    ) -> Optional[Dict[str, Union[str, int]]]:
+        key = (name, server)
+        now = time.monotonic()
+        memoized = self.memo.get(key, None)
+        if memoized is not None and memoized[0] > now:
+            return None if memoized[1] is None else dict(memoized[1])
+
+        task = self.in_flight.get(key, None)
+        if task is None:
+            task = asyncio.create_task(self.crawl(name, server))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        result = await asyncio.shield(task)
+
+        self.prune(now)
+        ttl = self.found_ttl if result is not None else self.missing_ttl
+        self.memo[key] = (time.monotonic() + ttl, result)
+        # Callers extend the result into a registration record, so hand out copies
+        return None if result is None else dict(result)
+
+    def prune(self, now: float):
+        for key in [key for key, (expiry, _) in self.memo.items() if expiry <= now]:
+            del self.memo[key]
+
+    async def fetch_page(self, name: str, server: str, page: int) -> SearchPage:
+        return parse_search_page(
+            await lodestone.get(
+                LODESTONE_BASE_URL,
+                params={"q": '"' + name + '"', "page": page, "worldname": server},
+            )
+        )
+
+    @staticmethod
+    def find_match(
+        page: SearchPage, name: str, server: str
+    ) -> Optional[Dict[str, Union[str, int]]]:
+        for found_id, found_name, found_server in page.entries:
+            if found_name == name and found_server.startswith(server):
+                return {
+                    "id": found_id,
+                    "name": found_name,
+                    "server": found_server,
+                }
+        return None
+
+    async def crawl(
+        self, name: str, server: str
+    ) -> Optional[Dict[str, Union[str, int]]]:
+        first = await self.fetch_page(name, server, 1)
+        found = self.find_match(first, name, server)
+        if found is not None:
+            return found
+
+        # Page 1 tells us how many pages there are, so fetch the rest all at once
+        pending = [
+            asyncio.create_task(self.fetch_page(name, server, page))
+            for page in range(2, min(first.num_pages, self.max_pages) + 1)
+        ]
+        try:
+            for next_page in asyncio.as_completed(pending):
+                found = self.find_match(await next_page, name, server)
+                if found is not None:
+                    return found
+        finally:
+            for task in pending:
+                task.cancel()
+        return None
+
+
+engine = CharacterSearch()
@@ -1,5 +1,6 @@
 import datetime
 import discord
+import enum
 
 
 CHANNEL_ID_MAP = {
@@ -111,6 +112,22 @@ ECHO_TOKEN_URL = "https://www.geraldmadethiscool.website/echo/"
 LODESTONE_BASE_URL = "https://na.finalfantasyxiv.com/lodestone/character/"
 LODESTONE_SEARCH_URL = "https://na.finalfantasyxiv.com/lodestone/community/search/"
 LODESTONE_ACHIEVEMENT_BASE_URL = "/achievement/detail/"
+LODESTONE_MAX_CONCURRENCY = 8
+LODESTONE_REQUEST_TIMEOUT = 15  # Seconds
+LODESTONE_KEEPALIVE_TIMEOUT = 30  # Seconds
+
+# Maps Host -> (Requests per second, Burst size)
+HOST_RATE_LIMITS = {"na.finalfantasyxiv.com": (10, 10)}
+DEFAULT_RATE_LIMIT = (5, 5)
+
+LODESTONE_SEARCH_MAX_PAGES = 5
+LODESTONE_SEARCH_FOUND_TTL = 600  # Seconds
+LODESTONE_SEARCH_MISSING_TTL = 60  # Seconds
+
+SNAPSHOT_TTL = 120  # Seconds
+SNAPSHOT_CACHE_SIZE = 512
+
+PARSE_CACHE_SIZE = 1024
 
 XIVAPI_BASE_URL = "https://xivapi.com/"
 
@@ -122,6 +139,33 @@ HALF_DAY = datetime.timedelta(days=0.5)
 MIN_MESSAGE_LIFETIME = datetime.timedelta(days=1)
 DEFAULT_MESSAGE_LIFETIME = datetime.timedelta(days=7)
 
+MODERATION_CHECK_CONCURRENCY = 8
+MODERATION_RETRY_DELAY = datetime.timedelta(minutes=5)
+MODERATION_CHECKPOINT_INTERVAL = datetime.timedelta(minutes=5)
+MODERATION_STATE_PATH = "data/moderation_state.json"
+
+STORAGE_PATH = "data/phoinix.db"
+STORAGE_BACKUP_PATH = "data/phoinix-backup.db"
+
+NAME_SWEEP_WORKERS = 2
+NAME_SWEEP_BATCH_SIZE = 50  # Users checked between checkpoints
+NAME_SWEEP_INTERVAL = datetime.timedelta(days=1)  # Time between the starts of sweeps
+NAME_SWEEP_STATE_PATH = "data/name_sweep.json"
+
+RECONCILE_WORKERS = 4
+RECONCILE_PACE = 0.5  # Least seconds between edits from one worker
+RECONCILE_CHECKPOINT_EVERY = 25  # Changes applied between checkpoints
+RECONCILE_STATE_PATH = "data/reconcile_state.json"
+
+REACTION_BINDINGS_PATH = "data/reaction_bindings.json"
+REACTION_BINDING_CHANNEL_IDS = [CHANNEL_ID_MAP["roles"], CHANNEL_ID_MAP["rules"]]
+
+GUIDE_INDEX_PATH = "data/guides.json"
+MAX_AUTOCOMPLETE_VALUES = 25  # Most choices Discord shows for an autocomplete
+
+WORLD_SUGGESTION_LIMIT = 3
+WORLD_SUGGESTION_DISTANCE = 2  # Most typos a suggested world can be away from the input
+
 
 LIFETIME_MAP = {CHANNEL_ID_MAP["drn-bozja-farming"]: datetime.timedelta(days=1)}
 
@@ -129,6 +173,11 @@ LIFETIME_MAP = {CHANNEL_ID_MAP["drn-bozja-farming"]: datetime.timedelta(days=1)}
 DO_NOTIFICATIONS_MAP = {CHANNEL_ID_MAP["drn-bozja-farming"]: False}
 
 MAX_SEARCH_VALUES = 25
+MAX_SEARCH_LOOKUPS = 100
+
+MEMBER_CACHE_TTL = 600  # Seconds
+MEMBER_CACHE_SIZE = 2048
+MEMBER_CHUNK_SIZE = 100  # Most user IDs Discord accepts in one member request
 
 OWN_ID = 1029108007264596038
 
@@ -151,18 +200,37 @@ BA_RECRUITING_CHANNELS = [
     CHANNEL_ID_MAP["bot-testing"],
 ]
 
-BA_RED_DPS = "Red DPS"
-BA_BLUE_DPS = "Blue DPS"
-BA_HEALER = "Healer"
-BA_MAIN_TANK = "Main Tank"
-BA_PRECEPTOR = "Preceptor"
-BA_FEINT = "Feint"
-BA_SPIRIT_DART = "Spirit Dart"
+class BARole(str, enum.Enum):
+    # Members compare and hash as their names, so role strings from JSON still match
+    RED_DPS = "Red DPS"
+    BLUE_DPS = "Blue DPS"
+    HEALER = "Healer"
+    MAIN_TANK = "Main Tank"
+    PRECEPTOR = "Preceptor"
+    FEINT = "Feint"
+    SPIRIT_DART = "Spirit Dart"
+
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+
+BA_RED_DPS = BARole.RED_DPS
+BA_BLUE_DPS = BARole.BLUE_DPS
+BA_HEALER = BARole.HEALER
+BA_MAIN_TANK = BARole.MAIN_TANK
+BA_PRECEPTOR = BARole.PRECEPTOR
+BA_FEINT = BARole.FEINT
+BA_SPIRIT_DART = BARole.SPIRIT_DART
 
 BA_ANY_TANK = [BA_MAIN_TANK, BA_BLUE_DPS]
 BA_ANY_DPS = [BA_RED_DPS, BA_BLUE_DPS]
 BA_ANY_NON_SPECIAL = [BA_ANY_DPS, BA_BLUE_DPS, BA_HEALER]
 
+BA_EMBED_DEBOUNCE = 1.5  # Seconds roster changes are gathered before one embed edit
+BA_OPTIMIZE_MAX_MOVES = 2  # Most members moved to fit one waitlisted player
+BA_OPTIMIZE_BUDGET = 5000  # Most roster states tried per waitlisted player
+BA_OPTIMIZE_YIELD_EVERY = 250  # Roster states tried between yields to the event loop
+
 BA_ROLE_EMOJI_MAPPING = {
     BA_RED_DPS: discord.PartialEmoji.from_str("<:DPS:1041624309514383370>"),
     BA_BLUE_DPS: discord.PartialEmoji.from_str("<:Tank:1041624337544912937>"),
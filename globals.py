@@ -3,9 +3,10 @@ from typing import *
 
 if TYPE_CHECKING:
     from ba_recruiting import BARun
+    from records import VerificationRecord
 
 # Maps User ID (Discord) -> (Token, Character ID (FFXIV))
-verification_map = {}  # type: Dict[int, Dict[str, Union[bool, int, str]]]
+verification_map = {}  # type: Dict[int, VerificationRecord]
 
 ba_run_post_map = {}  # type: Dict[int, BARun]
 
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import bisect
+from const import *
+from parsing import ParsedMessage
+from typing import *
+from utils import read_json, write_json_atomic
+
+
+def parse_guide(
+    parsed: ParsedMessage, attachment_urls: List[str]
+) -> Optional[Tuple[str, int, str]]:
+    # A guide message is a "<name> <position>" header plus an image
+    if parsed.guide_header is None or len(attachment_urls) == 0:
+        return None
+    return (*parsed.guide_header, attachment_urls[0])
+
+
+class GuideIndex:
+    def __init__(self, path: str = GUIDE_INDEX_PATH):
+        self.path = path
+        # Maps Guide Name -> (Position -> (Message ID, Image URL))
+        self.guides = {}  # type: Dict[str, Dict[int, Tuple[int, str]]]
+        # Maps Message ID -> (Guide Name, Position)
+        self.locations = {}  # type: Dict[int, Tuple[str, int]]
+        # Guide names kept sorted for prefix completion
+        self.names = []  # type: List[str]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.guides
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def clear(self):
+        self.guides = {}
+        self.locations = {}
+        self.names = []
+
+    def update(self, message_id: int, name: str, position: int, url: str):
+        self.remove(message_id)
+        if name not in self.guides:
+            self.guides[name] = {}
+            bisect.insort(self.names, name)
+        replaced = self.guides[name].get(position, None)
+        if replaced is not None:
+            # The newest message for a position wins
+            self.locations.pop(replaced[0], None)
+        self.guides[name][position] = (message_id, url)
+        self.locations[message_id] = (name, position)
+
+    def remove(self, message_id: int) -> bool:
+        location = self.locations.pop(message_id, None)
+        if location is None:
+            return False
+        name, position = location
+        pages = self.guides[name]
+        del pages[position]
+        if not pages:
+            del self.guides[name]
+            del self.names[bisect.bisect_left(self.names, name)]
+        return True
+
+    def entry(self, name: str, position: int) -> Optional[Tuple[int, str]]:
+        return self.guides.get(name, {}).get(position, None)
+
+    def urls(self, name: str) -> Optional[List[str]]:
+        pages = self.guides.get(name, None)
+        if pages is None:
+            return None
+        return [pages[position][1] for position in sorted(pages)]
+
+    def complete(self, prefix: str, limit: int = MAX_AUTOCOMPLETE_VALUES) -> List[str]:
+        start = bisect.bisect_left(self.names, prefix)
+        matches = []
+        for name in self.names[start : start + limit]:
+            if not name.startswith(prefix):
+                break
+            matches.append(name)
+        return matches
+
+    def save(self):
+        state = {
+            str(message_id): [name, position, self.guides[name][position][1]]
+            for message_id, (name, position) in self.locations.items()
+        }
+        write_json_atomic(self.path, state)
+
+    def load(self) -> bool:
+        state = read_json(self.path)
+        if state is None:
+            return False
+        self.clear()
+        for message_id, (name, position, url) in state.items():
+            self.update(int(message_id), name, position, url)
+        print(f"Loaded {len(self.names)} guides.")
+        return True
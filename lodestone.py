@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import aiohttp
+import asyncio
+from const import *
+import ratelimit
+from typing import *
+
+
+class LodestoneResponse:
+    def __init__(self, url: str, status_code: int, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+
+class LodestoneClient:
+    def __init__(
+        self,
+        max_concurrency: int = LODESTONE_MAX_CONCURRENCY,
+        timeout: float = LODESTONE_REQUEST_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None  # type: Optional[aiohttp.ClientSession]
+        # Created lazily, so it binds to the running event loop
+        self.slots = None  # type: Optional[asyncio.Semaphore]
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_concurrency,
+                    keepalive_timeout=LODESTONE_KEEPALIVE_TIMEOUT,
+                ),
+                timeout=self.timeout,
+            )
+            self.slots = asyncio.Semaphore(self.max_concurrency)
+        return self.session
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Union[str, int]]] = None,
+        priority: int = ratelimit.PRIORITY_INTERACTIVE,
+    ) -> LodestoneResponse:
+        session = self.get_session()
+        await ratelimit.limiter.acquire(url, priority)
+        async with self.slots:
+            async with session.get(url, params=params) as resp:
+                return LodestoneResponse(str(resp.url), resp.status, await resp.text())
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+
+client = LodestoneClient()
+
+
+async def get(
+    url: str,
+    params: Optional[Dict[str, Union[str, int]]] = None,
+    priority: int = ratelimit.PRIORITY_INTERACTIVE,
+) -> LodestoneResponse:
+    return await client.get(url, params, priority)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+import re
+from typing import *
+
+
+if TYPE_CHECKING:
+    import lodestone
+
+
+class CharacterProfile:
+    def __init__(self, name: str, server: str, self_introduction: str):
+        self.name = name
+        self.server = server
+        self.self_introduction = self_introduction
+
+
+class SearchPage:
+    def __init__(self, num_pages: int, entries: List[Tuple[int, str, str]]):
+        self.num_pages = num_pages
+        # (Character ID, Name, Server) for every result on the page
+        self.entries = entries
+
+
+class StopParsing(Exception):
+    pass
+
+
+class Capture:
+    def __init__(self, key: str, tag: str, attrs: Dict[str, Optional[str]]):
+        self.key = key
+        self.tag = tag
+        self.attrs = attrs
+        self.strings = []  # type: List[str]
+        # Nesting depth of tags with the same name as the captured one
+        self.depth = 1
+
+    @property
+    def text(self) -> str:
+        return "".join(self.strings)
+
+    @property
+    def stripped_strings(self) -> List[str]:
+        return [string.strip() for string in self.strings if string.strip()]
+
+
+# Streams a page, keeping only the elements matching (tag, class) selectors
+class SelectorParser(HTMLParser):
+    def __init__(self, selectors: Dict[str, Tuple[str, str]]):
+        super().__init__()
+        self.selectors = selectors
+        self.active = []  # type: List[Capture]
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        for capture in self.active:
+            if capture.tag == tag:
+                capture.depth += 1
+        classes = None
+        for key, (stag, sclass) in self.selectors.items():
+            if stag != tag:
+                continue
+            if classes is None:
+                classes = (dict(attrs).get("class") or "").split()
+            if sclass in classes:
+                capture = Capture(key, tag, dict(attrs))
+                if not self.on_start(capture):
+                    self.active.append(capture)
+
+    def handle_endtag(self, tag: str):
+        for capture in list(self.active):
+            if capture.tag == tag:
+                capture.depth -= 1
+                if capture.depth == 0:
+                    self.active.remove(capture)
+                    self.on_end(capture)
+
+    def handle_data(self, data: str):
+        for capture in self.active:
+            capture.strings.append(data)
+
+    def on_start(self, capture: Capture) -> bool:
+        # Returns True if the element is fully handled by its start tag
+        return False
+
+    def on_end(self, capture: Capture):
+        pass
+
+    def run(self, text: str):
+        try:
+            self.feed(text)
+            self.close()
+        except StopParsing:
+            pass
+
+
+class ProfileParser(SelectorParser):
+    def __init__(self):
+        super().__init__(
+            {
+                "name": ("p", "frame__chara__name"),
+                "server": ("p", "frame__chara__world"),
+                "self_introduction": ("div", "character__selfintroduction"),
+            }
+        )
+        self.found = {}  # type: Dict[str, str]
+
+    def on_end(self, capture: Capture):
+        if capture.key not in self.found:
+            self.found[capture.key] = capture.text
+        if len(self.found) == len(self.selectors):
+            raise StopParsing()
+
+
+class MountParser(SelectorParser):
+    def __init__(self):
+        super().__init__({"mount": ("li", "mount__list_icon")})
+        self.mounts = set()  # type: Set[str]
+
+    def on_start(self, capture: Capture) -> bool:
+        href = capture.attrs.get("data-tooltip_href", None)
+        if href is not None:
+            self.mounts.add(href.rstrip("/").split("/")[-1])
+        return True
+
+
+class AchievementParser(SelectorParser):
+    def __init__(self):
+        super().__init__(
+            {"complete": ("div", "entry__achievement__view--complete")}
+        )
+        self.complete = False
+
+    def on_start(self, capture: Capture) -> bool:
+        self.complete = True
+        raise StopParsing()
+
+
+class SearchParser(SelectorParser):
+    def __init__(self):
+        super().__init__(
+            {
+                "pager": ("li", "btn__pager__current"),
+                "entry": ("a", "entry__link"),
+            }
+        )
+        self.num_pages = 1
+        self.entries = []  # type: List[Tuple[int, str, str]]
+
+    def on_end(self, capture: Capture):
+        if capture.key == "pager":
+            num_pages_match = re.match(r"Page \d+ of (\d+)", capture.text)
+            if num_pages_match is not None:
+                self.num_pages = int(num_pages_match[1])
+        else:
+            found_name, found_server, _, _ = capture.stripped_strings
+            found_id = capture.attrs["href"].split("/")[-2]
+            self.entries.append((int(found_id), found_name, found_server))
+
+
+def parse_profile(resp: lodestone.LodestoneResponse) -> Optional[CharacterProfile]:
+    if resp.status_code == 404:
+        return None
+    parser = ProfileParser()
+    parser.run(resp.text)
+    return CharacterProfile(
+        parser.found["name"],
+        parser.found["server"],
+        parser.found.get("self_introduction", ""),
+    )
+
+
+def parse_mounts(resp: lodestone.LodestoneResponse) -> Set[str]:
+    if resp.status_code == 404:
+        return set()
+    parser = MountParser()
+    parser.run(resp.text)
+    return parser.mounts
+
+
+def parse_achievement(resp: lodestone.LodestoneResponse) -> Optional[bool]:
+    if resp.status_code == 404:
+        return None  # signals hidden achievements
+    parser = AchievementParser()
+    parser.run(resp.text)
+    return parser.complete
+
+
+def parse_search_page(resp: lodestone.LodestoneResponse) -> SearchPage:
+    parser = SearchParser()
+    parser.run(resp.text)
+    return SearchPage(parser.num_pages, parser.entries)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+from const import *
+import discord
+import time
+from typing import *
+from utils import schedule_task
+
+
+class MemberResolver:
+    def __init__(
+        self, ttl: float = MEMBER_CACHE_TTL, max_size: int = MEMBER_CACHE_SIZE
+    ):
+        self.guild = None  # type: Optional[discord.Guild]
+        self.ttl = ttl
+        self.max_size = max_size
+        # Maps Member ID -> (Expiry, Member), for members the gateway cache lacks
+        self.seen = (
+            collections.OrderedDict()
+        )  # type: collections.OrderedDict[int, Tuple[float, discord.Member]]
+        # Maps Member ID -> Futures waiting on the next batched lookup
+        self.pending = {}  # type: Dict[int, List[asyncio.Future]]
+        self.flush_scheduled = False
+
+    def bind(self, guild: discord.Guild):
+        self.guild = guild
+
+    def remember(self, member: discord.Member):
+        self.seen[member.id] = (time.monotonic() + self.ttl, member)
+        self.seen.move_to_end(member.id)
+        while len(self.seen) > self.max_size:
+            self.seen.popitem(last=False)
+
+    def cached(self, id: int) -> Optional[discord.Member]:
+        member = self.guild.get_member(id)
+        if member is not None:
+            return member
+        seen = self.seen.get(id, None)
+        if seen is None:
+            return None
+        expiry, member = seen
+        if expiry < time.monotonic():
+            del self.seen[id]
+            return None
+        return member
+
+    async def resolve(self, id: int) -> Optional[discord.Member]:
+        member = self.cached(id)
+        if member is not None:
+            return member
+        waiter = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(id, []).append(waiter)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            schedule_task(self.flush())
+        return await waiter
+
+    async def resolve_many(self, ids: Iterable[int]) -> Dict[int, Optional[discord.Member]]:
+        ids = list(ids)
+        members = await asyncio.gather(*(self.resolve(id) for id in ids))
+        return dict(zip(ids, members))
+
+    async def flush(self):
+        # Yield once, so every lookup made in the same burst lands in one batch
+        await asyncio.sleep(0)
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, {}
+        ids = list(pending)
+        found = {}  # type: Dict[int, discord.Member]
+        try:
+            for start in range(0, len(ids), MEMBER_CHUNK_SIZE):
+                chunk = ids[start : start + MEMBER_CHUNK_SIZE]
+                try:
+                    for member in await self.guild.query_members(
+                        user_ids=chunk, limit=len(chunk)
+                    ):
+                        found[member.id] = member
+                        self.remember(member)
+                except asyncio.TimeoutError:
+                    print(f"Timed out resolving {len(chunk)} members over the gateway")
+        finally:
+            for id, waiters in pending.items():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(found.get(id, None))
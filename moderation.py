@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+from const import *
+import heapq
+import time
+from typing import *
+from utils import read_json, schedule_task, wait_and_clear, write_json_atomic
+
+
+class ModerationEntry:
+    def __init__(
+        self,
+        message_id: int,
+        channel_id: int,
+        author_id: Optional[int] = None,
+        default_lifetime: Optional[datetime.timedelta] = None,
+        minimum_lifetime: Optional[datetime.timedelta] = None,
+        notification_time: Optional[datetime.timedelta] = None,
+        do_notifications: bool = True,
+    ):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.default_lifetime = (
+            DEFAULT_MESSAGE_LIFETIME if default_lifetime is None else default_lifetime
+        )
+        self.minimum_lifetime = (
+            MIN_MESSAGE_LIFETIME if minimum_lifetime is None else minimum_lifetime
+        )
+        self.notification_time = (
+            self.minimum_lifetime if notification_time is None else notification_time
+        )
+        self.do_notifications = do_notifications
+        self.notified = False
+        self.dnd = False
+        # Whether dnd is known to be current, reaction events keep it so once it is
+        self.reconciled = False
+        self.started = False
+        # Unix timestamp the message expires at, None until first checked
+        self.expiration = None  # type: Optional[float]
+        # Unix timestamp of the next check, None while waiting for an event
+        self.due = None  # type: Optional[float]
+        # Bumped on every reschedule, so older heap entries can be recognised as stale
+        self.version = 0
+        self.checking = False
+        self.recheck = False
+
+    def next_due(self) -> float:
+        now = time.time()
+        if self.expiration is None:
+            return now
+        if (
+            self.dnd
+            or self.expiration - now < self.notification_time.total_seconds()
+        ):
+            return self.expiration
+        return self.expiration - self.minimum_lifetime.total_seconds() + 1
+
+    def to_dict(self) -> Dict[str, Union[int, float, bool, None]]:
+        return {
+            "channel_id": self.channel_id,
+            "author_id": self.author_id,
+            "expiration": self.expiration,
+            "dnd": self.dnd,
+            "notified": self.notified,
+        }
+
+
+class ModerationScheduler:
+    def __init__(
+        self,
+        check: Callable[[ModerationEntry], Awaitable[Optional[float]]],
+        concurrency: int = MODERATION_CHECK_CONCURRENCY,
+    ):
+        self.check = check
+        # Maps Message ID -> Entry
+        self.entries = {}  # type: Dict[int, ModerationEntry]
+        # Heap of (Due Timestamp, Version, Message ID)
+        self.heap = []  # type: List[Tuple[float, int, int]]
+        self.wake = asyncio.Event()
+        self.slots = asyncio.Semaphore(concurrency)
+        self.running = False
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            schedule_task(self.run())
+
+    def watch(self, entry: ModerationEntry, due: Optional[float] = None):
+        self.entries[entry.message_id] = entry
+        self.schedule(entry, time.time() if due is None else due)
+
+    def forget(self, message_id: int):
+        self.entries.pop(message_id, None)
+
+    def set_dnd(self, message_id: int, user_id: int, dnd: bool):
+        entry = self.entries.get(message_id, None)
+        # Only the author can mark their own message do not delete
+        if entry is None or entry.author_id != user_id:
+            return
+        entry.reconciled = True
+        if entry.dnd != dnd:
+            entry.dnd = dnd
+            self.reschedule(message_id)
+
+    def reschedule(self, message_id: int):
+        entry = self.entries.get(message_id, None)
+        if entry is None:
+            return
+        if entry.checking:
+            entry.recheck = True
+        else:
+            self.schedule(entry, time.time())
+
+    def schedule(self, entry: ModerationEntry, due: float):
+        entry.version += 1
+        entry.due = due
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.compact()
+        heapq.heappush(self.heap, (due, entry.version, entry.message_id))
+        if self.heap[0][2] == entry.message_id:
+            self.wake.set()
+
+    def compact(self):
+        self.heap = [item for item in self.heap if not self.is_stale(item)]
+        heapq.heapify(self.heap)
+
+    def is_stale(self, item: Tuple[float, int, int]) -> bool:
+        _, version, message_id = item
+        entry = self.entries.get(message_id, None)
+        return entry is None or entry.version != version or entry.checking
+
+    async def run(self):
+        while True:
+            while self.heap and self.is_stale(self.heap[0]):
+                heapq.heappop(self.heap)
+            if not self.heap:
+                await wait_and_clear(self.wake)
+                continue
+            due, _, message_id = self.heap[0]
+            delay = due - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(wait_and_clear(self.wake), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self.heap)
+            entry = self.entries[message_id]
+            entry.due = None
+            entry.checking = True
+            await self.slots.acquire()
+            schedule_task(self.run_check(entry))
+
+    async def run_check(self, entry: ModerationEntry):
+        due = None
+        try:
+            due = await self.check(entry)
+        except Exception as e:
+            print(f"Moderation check failed for message {entry.message_id}: {e!r}")
+            due = time.time() + MODERATION_RETRY_DELAY.total_seconds()
+        finally:
+            entry.checking = False
+            self.slots.release()
+        if self.entries.get(entry.message_id, None) is not entry:
+            return
+        if entry.recheck:
+            entry.recheck = False
+            due = time.time()
+        if due is not None:
+            self.schedule(entry, due)
+
+    def save(self, path: str):
+        state = {
+            "checkpoint": time.time(),
+            "messages": {
+                str(message_id): entry.to_dict()
+                for message_id, entry in self.entries.items()
+            },
+        }
+        write_json_atomic(path, state)
+
+    def load(
+        self,
+        path: str,
+        make_entry: Callable[[int, int, Optional[int]], ModerationEntry],
+    ) -> Optional[float]:
+        state = read_json(path)
+        if state is None:
+            return None
+        for message_id, saved in state["messages"].items():
+            entry = make_entry(
+                int(message_id), saved["channel_id"], saved.get("author_id", None)
+            )
+            entry.expiration = saved["expiration"]
+            entry.dnd = saved["dnd"]
+            entry.notified = saved["notified"]
+            # Reactions were already set up before the checkpoint
+            entry.started = entry.expiration is not None
+            self.watch(entry, entry.next_due())
+        print(f"Restored {len(state['messages'])} moderated messages.")
+        return state["checkpoint"]
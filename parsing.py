@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import collections
+from const import *
+import datetime
+import discord
+import re
+from typing import *
+
+
+HAMMERTIME = re.compile(r"<t:(\d+):\w>")
+ROLE_MENTION = re.compile(r"<@&(\d+)>")
+REACT_BINDING = re.compile(r"\s*(\S+?)\s+=[a-zA-z* ]*<@&(\d+)>")
+# A guide message is "<name> <position>" on the first line
+GUIDE_HEADER = re.compile(r"(\S+)\s+(\d+)\s*")
+GUIDE_NAME = re.compile(r"\S+")
+
+
+class ParsedMessage:
+    # Shared between every path that looks at the same message, so never mutated
+    __slots__ = ("timestamps", "role_mentions", "react_bindings", "guide_header")
+
+    def __init__(self, content: str):
+        self.timestamps = tuple(
+            datetime.datetime.fromtimestamp(stamp, datetime.timezone.utc)
+            for stamp in sorted(set(int(val) for val in HAMMERTIME.findall(content)))
+        )  # type: Tuple[datetime.datetime, ...]
+        self.role_mentions = frozenset(
+            int(val) for val in ROLE_MENTION.findall(content)
+        )  # type: FrozenSet[int]
+        self.react_bindings = tuple(
+            (discord.PartialEmoji.from_str(emoji), int(role_id))
+            for emoji, role_id in REACT_BINDING.findall(content)
+        )  # type: Tuple[Tuple[discord.PartialEmoji, int], ...]
+        header = GUIDE_HEADER.match(content.split("\n", 1)[0])
+        self.guide_header = (
+            None if header is None else (header[1], int(header[2]))
+        )  # type: Optional[Tuple[str, int]]
+
+
+class MessageParser:
+    def __init__(self, max_size: int = PARSE_CACHE_SIZE):
+        self.max_size = max_size
+        # Maps (Message ID, Edit Time) -> ParsedMessage, least recently used first
+        self.cache = (
+            collections.OrderedDict()
+        )  # type: collections.OrderedDict[Tuple[int, Optional[datetime.datetime]], ParsedMessage]
+
+    def parse(
+        self,
+        message_id: int,
+        edited_at: Optional[datetime.datetime],
+        content: str,
+    ) -> ParsedMessage:
+        # An edit changes the key, so stale parses age out instead of being served
+        key = (message_id, edited_at)
+        parsed = self.cache.get(key, None)
+        if parsed is not None:
+            self.cache.move_to_end(key)
+            return parsed
+        parsed = ParsedMessage(content)
+        self.cache[key] = parsed
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return parsed
+
+    def forget(self, message_id: int):
+        for key in [key for key in self.cache if key[0] == message_id]:
+            del self.cache[key]
+
+
+parser = MessageParser()
+
+
+def parse_message(message: discord.Message) -> ParsedMessage:
+    return parser.parse(message.id, message.edited_at, message.content)
+
+
+def parse_payload(payload: discord.RawMessageUpdateEvent) -> Optional[ParsedMessage]:
+    # Embed-only updates come without content, there is nothing new to parse
+    if "content" not in payload.data:
+        return None
+    return parser.parse(
+        payload.message_id,
+        discord.utils.parse_time(payload.data.get("edited_timestamp", None)),
+        payload.data["content"],
+    )
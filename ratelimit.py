@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+from const import *
+import heapq
+import itertools
+import time
+from typing import *
+from urllib.parse import urlsplit
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        # Heap of (Priority, Arrival, Grant Future)
+        self.waiters = []  # type: List[Tuple[int, int, asyncio.Future]]
+        self.arrivals = itertools.count()
+        self.waker = None  # type: Optional[asyncio.TimerHandle]
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def dispatch(self):
+        self.waker = None
+        self.refill()
+        while self.waiters and self.tokens >= 1:
+            _, _, grant = heapq.heappop(self.waiters)
+            if grant.done():
+                # Waiter was cancelled while queued
+                continue
+            self.tokens -= 1
+            grant.set_result(None)
+        while self.waiters and self.waiters[0][2].done():
+            heapq.heappop(self.waiters)
+        if self.waiters and self.waker is None:
+            # Sleep exactly until the next token exists, rather than polling
+            self.waker = asyncio.get_running_loop().call_later(
+                (1 - self.tokens) / self.rate, self.dispatch
+            )
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        start = time.monotonic()
+        self.refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            self.record(0.0)
+            return 0.0
+        grant = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.arrivals), grant))
+        if self.waker is None:
+            self.dispatch()
+        try:
+            await grant
+        except asyncio.CancelledError:
+            if grant.done() and not grant.cancelled():
+                # Token was granted just as we were cancelled, hand it back
+                self.tokens = min(self.capacity, self.tokens + 1)
+                self.dispatch()
+            raise
+        wait = time.monotonic() - start
+        self.record(wait)
+        return wait
+
+    def record(self, wait: float):
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "granted": self.granted,
+            "queued": sum(not grant.done() for _, _, grant in self.waiters),
+            "mean_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, float]],
+        default_limit: Tuple[float, float],
+    ):
+        self.limits = limits
+        self.default_limit = default_limit
+        # Maps Host -> Bucket
+        self.buckets = {}  # type: Dict[str, TokenBucket]
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or ""
+        bucket = self.buckets.get(host, None)
+        if bucket is None:
+            bucket = TokenBucket(*self.limits.get(host, self.default_limit))
+            self.buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, url: str, priority: int = PRIORITY_INTERACTIVE) -> float:
+        return await self.bucket_for(url).acquire(priority)
+
+    def report(self) -> str:
+        lines = []
+        for host, bucket in self.buckets.items():
+            stats = bucket.stats()
+            lines.append(
+                f"{host}: {stats['granted']} calls, {stats['queued']} queued, waits"
+                f" {stats['mean_wait']:.2f}s mean / {stats['max_wait']:.2f}s max"
+            )
+        return "\n".join(lines)
+
+
+limiter = RateLimiter(HOST_RATE_LIMITS, DEFAULT_RATE_LIMIT)
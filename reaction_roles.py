@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from const import *
+import discord
+from parsing import ParsedMessage
+from typing import *
+from utils import read_json, write_json_atomic
+
+
+class ReactionBindings:
+    def __init__(self, path: str = REACTION_BINDINGS_PATH):
+        self.path = path
+        # Maps Message ID -> (Emoji -> Role ID)
+        self.bindings = {}  # type: Dict[int, Dict[discord.PartialEmoji, int]]
+
+    def get(self, message_id: int) -> Optional[Dict[discord.PartialEmoji, int]]:
+        return self.bindings.get(message_id, None)
+
+    def clear(self):
+        self.bindings = {}
+
+    def update(
+        self, message_id: int, parsed: ParsedMessage
+    ) -> List[discord.PartialEmoji]:
+        # Returns the emoji this message did not already bind, which still need reacting
+        old = self.bindings.get(message_id, {})
+        new = dict(parsed.react_bindings)
+        self.bindings[message_id] = new
+        return [emoji for emoji in new if emoji not in old]
+
+    def remove(self, message_id: int) -> bool:
+        return self.bindings.pop(message_id, None) is not None
+
+    def save(self):
+        state = {
+            str(message_id): {str(emoji): role_id for emoji, role_id in binds.items()}
+            for message_id, binds in self.bindings.items()
+        }
+        write_json_atomic(self.path, state)
+
+    def load(self) -> bool:
+        state = read_json(self.path)
+        if state is None:
+            return False
+        self.bindings = {
+            int(message_id): {
+                discord.PartialEmoji.from_str(emoji): role_id
+                for emoji, role_id in binds.items()
+            }
+            for message_id, binds in state.items()
+        }
+        print(f"Loaded reaction bindings for {len(self.bindings)} messages.")
+        return True
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+from const import *
+import discord
+import os
+import time
+from typing import *
+from utils import read_json, write_json_atomic
+
+
+class Change:
+    def __init__(
+        self,
+        member_id: int,
+        add_roles: Optional[List[int]] = None,
+        remove_roles: Optional[List[int]] = None,
+        clear_roles: bool = False,
+        nick: Optional[str] = None,
+    ):
+        self.member_id = member_id
+        self.add_roles = [] if add_roles is None else add_roles
+        self.remove_roles = [] if remove_roles is None else remove_roles
+        self.clear_roles = clear_roles
+        self.nick = nick
+        self.done = False
+
+    def describe(self) -> str:
+        parts = []
+        if self.clear_roles:
+            parts.append("clear roles")
+        if self.add_roles:
+            parts.append(f"add {self.add_roles}")
+        if self.remove_roles:
+            parts.append(f"remove {self.remove_roles}")
+        if self.nick is not None:
+            parts.append(f"nick {self.nick!r}")
+        return f"{self.member_id}: {', '.join(parts)}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "member_id": self.member_id,
+            "add_roles": self.add_roles,
+            "remove_roles": self.remove_roles,
+            "clear_roles": self.clear_roles,
+            "nick": self.nick,
+        }
+
+    async def apply(self, member: discord.Member):
+        if self.clear_roles:
+            await member.edit(roles=[])
+        if self.add_roles:
+            await member.add_roles(*(discord.Object(id) for id in self.add_roles))
+        if self.remove_roles:
+            await member.remove_roles(*(discord.Object(id) for id in self.remove_roles))
+        if self.nick is not None:
+            await member.edit(nick=self.nick)
+
+
+class Reconciler:
+    def __init__(
+        self,
+        workers: int = RECONCILE_WORKERS,
+        path: str = RECONCILE_STATE_PATH,
+    ):
+        self.workers = workers
+        self.path = path
+        self.guild = None  # type: Optional[discord.Guild]
+        self.kind = None  # type: Optional[str]
+        self.changes = []  # type: List[Change]
+        self.applied = 0
+        self.failed = []  # type: List[Tuple[Change, str]]
+        self.running = False
+        self.lock = asyncio.Lock()
+
+    def bind(self, guild: discord.Guild):
+        self.guild = guild
+
+    def status(self) -> str:
+        if self.kind is None:
+            return "No reconciliation has run."
+        return (
+            f"{self.kind}: {self.applied}/{len(self.changes)} applied,"
+            f" {len(self.failed)} failed{'' if self.running else ', idle'}."
+        )
+
+    async def run(self, kind: str, changes: List[Change], dry_run: bool = False):
+        if self.lock.locked():
+            print(f"A reconciliation is already running. {self.status()}")
+            return
+        async with self.lock:
+            self.kind = kind
+            self.changes = changes
+            self.applied = 0
+            self.failed = []
+            print(f"Planned {len(changes)} changes for {kind}.")
+            if dry_run:
+                for change in changes:
+                    print(change.describe())
+                return
+            self.running = True
+            try:
+                await self.apply_all()
+            finally:
+                self.running = False
+            print(f"Finished. {self.status()}")
+            for change, error in self.failed:
+                print(f"Failed {change.describe()} ({error})")
+            if self.failed:
+                print("The failed changes are kept, reconcile resume retries them.")
+
+    async def apply_all(self):
+        pending = asyncio.Queue()  # type: asyncio.Queue[Change]
+        for change in self.changes:
+            if not change.done:
+                pending.put_nowait(change)
+        self.save()
+        await asyncio.gather(*(self.work(pending) for _ in range(self.workers)))
+        if self.failed:
+            # Failed changes are still not done, so the saved plan keeps them for resume
+            self.save()
+        else:
+            os.remove(self.path)
+
+    async def work(self, pending: asyncio.Queue):
+        while not pending.empty():
+            change = pending.get_nowait()
+            started = time.monotonic()
+            member = self.guild.get_member(change.member_id)
+            applied = True
+            if member is not None:
+                # Discord's own buckets handle 429s, this keeps us well clear of them
+                try:
+                    await change.apply(member)
+                except discord.HTTPException as e:
+                    self.failed.append((change, f"{e.status} {e.text}"))
+                    applied = False
+            if applied:
+                change.done = True
+                self.applied += 1
+            if (self.applied + len(self.failed)) % RECONCILE_CHECKPOINT_EVERY == 0:
+                self.save()
+                print(self.status())
+            await asyncio.sleep(
+                max(RECONCILE_PACE - (time.monotonic() - started), 0)
+            )
+
+    async def resume(self):
+        state = read_json(self.path)
+        if state is None:
+            print("Nothing to resume.")
+            return
+        changes = [Change(**change) for change in state["changes"]]
+        await self.run(state["kind"], changes)
+
+    def save(self):
+        state = {
+            "kind": self.kind,
+            "changes": [
+                change.to_dict() for change in self.changes if not change.done
+            ],
+        }
+        write_json_atomic(self.path, state)
+
+
+def plan_mark(members: Iterable[discord.Member]) -> List[Change]:
+    changes = []
+    for member in members:
+        roles = [role.id for role in member.roles]
+        if len(roles) == 2 and ROLE_ID_MAP["Not Verified"] in roles:
+            changes.append(
+                Change(member.id, remove_roles=[ROLE_ID_MAP["Not Verified"]])
+            )
+        elif (
+            len(roles) > 1
+            and ROLE_ID_MAP["Member"] not in roles
+            and ROLE_ID_MAP["Not Verified"] not in roles
+        ):
+            changes.append(Change(member.id, add_roles=[ROLE_ID_MAP["Not Verified"]]))
+    return changes
+
+
+def plan_purge(members: Iterable[discord.Member]) -> List[Change]:
+    return [
+        Change(member.id, clear_roles=True)
+        for member in members
+        if any(role.id == ROLE_ID_MAP["Not Verified"] for role in member.roles)
+    ]
+
+
+def plan_fixnames(
+    members: Iterable[discord.Member],
+    desired_nick: Callable[[discord.Member], Optional[str]],
+) -> List[Change]:
+    changes = []
+    for member in members:
+        nick = desired_nick(member)
+        if nick is not None:
+            changes.append(Change(member.id, nick=nick))
+    return changes
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import sys
+from typing import *
+
+
+class VerificationRecord:
+    # Slotted, as the registry keeps one of these per registered user
+    __slots__ = ("id", "name", "_server", "token", "valid")
+
+    def __init__(
+        self,
+        id: int,
+        name: Optional[str],
+        server: Optional[str],
+        token: str,
+        valid: bool = False,
+    ):
+        self.id = id
+        self.name = name
+        self.server = server
+        self.token = token
+        self.valid = valid
+
+    @property
+    def server(self) -> Optional[str]:
+        return self._server
+
+    @server.setter
+    def server(self, server: Optional[str]):
+        # A few hundred worlds are shared by every user, so keep one copy of each
+        self._server = None if server is None else sys.intern(server)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Union[bool, int, str]]) -> VerificationRecord:
+        return cls(
+            data["id"], data["name"], data["server"], data["token"], data["valid"]
+        )
+
+    def to_dict(self) -> Dict[str, Union[bool, int, str]]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "server": self.server,
+            "token": self.token,
+            "valid": self.valid,
+        }
@@ -4,6 +4,8 @@ from typing import *
 
 
 class RunMember:
+    __slots__ = ("name", "role", "id")
+
     def __init__(self, name: str, role: str, id: int):
         self.name = name
         self.role = role
@@ -19,6 +21,8 @@ class RunMember:
 
 
 class Group:
+    __slots__ = ("leader", "members", "index")
+
     def __init__(
         self,
         members: List[Union[Dict[str, str], RunMember]],
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from const import *
+import globals
+import ratelimit
+from records import VerificationRecord
+import search_index
+import secrets
+import storage
+from sweeper import NameSweeper
+from typing import *
+from utils import extract_name_server, lodestone_search
+
+
+def known_discord_id(id: int) -> bool:
+    return globals.verification_map.get(id, None) is not None
+
+
+def get_user_token(id: int) -> str:
+    if known_discord_id(id):
+        return globals.verification_map[id].token
+    else:
+        return secrets.token_urlsafe(8)
+
+
+def get_user_ffxiv_id(id: int) -> Optional[int]:
+    if known_discord_id(id):
+        return globals.verification_map[id].id
+    return None
+
+
+def save_user(did: int):
+    record = globals.verification_map[did]
+    storage.database.save_user(did, record)
+    search_index.names.update(did, record.name, record.server)
+
+
+async def refresh_user_name(did: int) -> bool:
+    record = globals.verification_map.get(did, None)
+    if record is None:
+        return False
+    found = await extract_name_server(record.id, ratelimit.PRIORITY_BACKGROUND)
+    if found is None or found == (record.name, record.server):
+        return False
+    record.name, record.server = found
+    save_user(did)
+    return True
+
+
+name_sweeper = NameSweeper(refresh_user_name, lambda: list(globals.verification_map))
+
+
+def get_user_ffxiv_name_server(id: int) -> Optional[Tuple[str, str]]:
+    if known_discord_id(id):
+        record = globals.verification_map[id]
+        if record.name is None:
+            # Never scraped on demand, the sweeper fetches it ahead of everyone else
+            name_sweeper.enqueue(id, urgent=True)
+            return None
+        return record.name, record.server
+    return None
+
+
+async def register_user(did: int, name: str, server: str, cid: Optional[int] = None) -> bool:
+    search = await lodestone_search(name, server) if cid is None else {
+        "id": cid,
+        "name": name,
+        "server": server,
+    }
+    if search is None:
+        return False
+    globals.verification_map[did] = VerificationRecord(
+        search["id"], search["name"], search["server"], get_user_token(did)
+    )
+    save_user(did)
+    return True
+
+
+async def force_register_user(did: int, fid: int, name: str, server: str):
+    globals.verification_map[did] = VerificationRecord(
+        fid, name, server, get_user_token(did)
+    )
+    save_user(did)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import re
+from typing import *
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: re.Pattern) -> List[str]:
+    # Runs of plain characters every match must contain, read off the top level of the regex
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return []
+    literals = []
+    current = []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(value))
+        else:
+            if op is sre_parse.BRANCH:
+                # Alternatives mean nothing on this level is required
+                return []
+            if current:
+                literals.append("".join(current))
+            current = []
+    if current:
+        literals.append("".join(current))
+    return literals
+
+
+class NameIndex:
+    def __init__(self):
+        # Maps Discord ID -> (Name, Server)
+        self.entries = {}  # type: Dict[int, Tuple[str, str]]
+        # Maps Trigram of a lowercased name -> Discord IDs
+        self.postings = {}  # type: Dict[str, Set[int]]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def update(self, did: int, name: Optional[str], server: Optional[str]):
+        self.remove(did)
+        if name is None:
+            return
+        self.entries[did] = (name, server or "")
+        for gram in trigrams(name.lower()):
+            self.postings.setdefault(gram, set()).add(did)
+
+    def remove(self, did: int):
+        existing = self.entries.pop(did, None)
+        if existing is None:
+            return
+        for gram in trigrams(existing[0].lower()):
+            posting = self.postings.get(gram, None)
+            if posting is not None:
+                posting.discard(did)
+                if not posting:
+                    del self.postings[gram]
+
+    def candidates(self, pattern: re.Pattern) -> Iterable[int]:
+        grams = set()
+        for literal in required_literals(pattern):
+            grams |= trigrams(literal.lower())
+        if not grams:
+            return self.entries.keys()
+        # Rarest trigram first keeps the intersections small
+        postings = sorted(
+            (self.postings.get(gram, set()) for gram in grams), key=len
+        )
+        found = set(postings[0])
+        for posting in postings[1:]:
+            found &= posting
+            if not found:
+                break
+        return found
+
+    def search(
+        self, pattern: re.Pattern, server: Optional[str] = None
+    ) -> List[Tuple[int, str, str]]:
+        matches = []
+        for did in self.candidates(pattern):
+            name, fserver = self.entries[did]
+            if pattern.search(name) is not None and (
+                server is None or server in fserver
+            ):
+                matches.append((did, name, fserver))
+        return matches
+
+
+names = NameIndex()
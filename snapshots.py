@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+from const import *
+import lodestone
+from lodestone_parser import (
+    CharacterProfile,
+    parse_achievement,
+    parse_mounts,
+    parse_profile,
+)
+import ratelimit
+import time
+from typing import *
+
+
+class CharacterSnapshot:
+    def __init__(self, ffxiv_id: int):
+        self.ffxiv_id = ffxiv_id
+        self.profile = None  # type: Optional[CharacterProfile]
+        self.mounts = set()  # type: Set[str]
+        # Maps Achievement ID -> Completed (None if achievements are hidden)
+        self.achievements = {}  # type: Dict[int, Optional[bool]]
+        # Maps Page Key -> Monotonic time the page was fetched
+        self.fetched_at = {}  # type: Dict[Hashable, float]
+
+    def is_fresh(self, page: Hashable, max_age: float) -> bool:
+        fetched_at = self.fetched_at.get(page, None)
+        return fetched_at is not None and time.monotonic() - fetched_at < max_age
+
+
+class SnapshotCache:
+    def __init__(
+        self, ttl: float = SNAPSHOT_TTL, max_size: int = SNAPSHOT_CACHE_SIZE
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.snapshots = (
+            collections.OrderedDict()
+        )  # type: collections.OrderedDict[int, CharacterSnapshot]
+        # Maps (Character ID, Page Key) -> Fetch in progress
+        self.in_flight = {}  # type: Dict[Tuple[int, Hashable], asyncio.Task]
+
+    def get(self, ffxiv_id: int) -> CharacterSnapshot:
+        snapshot = self.snapshots.get(ffxiv_id, None)
+        if snapshot is None:
+            snapshot = CharacterSnapshot(ffxiv_id)
+            self.snapshots[ffxiv_id] = snapshot
+            while len(self.snapshots) > self.max_size:
+                self.snapshots.popitem(last=False)
+        else:
+            self.snapshots.move_to_end(ffxiv_id)
+        return snapshot
+
+    def invalidate(self, ffxiv_id: int):
+        self.snapshots.pop(ffxiv_id, None)
+
+    async def load(
+        self,
+        ffxiv_id: int,
+        page: Hashable,
+        fetch: Callable[[CharacterSnapshot], Awaitable[None]],
+        max_age: Optional[float] = None,
+        recheck: Optional[Callable[[CharacterSnapshot], bool]] = None,
+    ) -> CharacterSnapshot:
+        # recheck says whether a cached answer is worth doubting, a page fetched by
+        # this call is always trusted, so a doubtful answer costs at most one fetch
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self.get(ffxiv_id)
+        if snapshot.is_fresh(page, max_age) and (
+            recheck is None or not recheck(snapshot)
+        ):
+            return snapshot
+        key = (ffxiv_id, page)
+        task = self.in_flight.get(key, None)
+        if task is None:
+            task = asyncio.create_task(self.fetch_page(snapshot, page, fetch))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # Shielded so one cancelled waiter does not cancel the fetch for everyone else
+        await asyncio.shield(task)
+        return snapshot
+
+    @staticmethod
+    async def fetch_page(
+        snapshot: CharacterSnapshot,
+        page: Hashable,
+        fetch: Callable[[CharacterSnapshot], Awaitable[None]],
+    ):
+        await fetch(snapshot)
+        snapshot.fetched_at[page] = time.monotonic()
+
+
+cache = SnapshotCache()
+
+
+async def get_profile(
+    ffxiv_id: int,
+    max_age: Optional[float] = None,
+    priority: int = ratelimit.PRIORITY_INTERACTIVE,
+    recheck: Optional[Callable[[Optional[CharacterProfile]], bool]] = None,
+) -> Optional[CharacterProfile]:
+    async def fetch(snapshot: CharacterSnapshot):
+        snapshot.profile = parse_profile(
+            await lodestone.get(f"{LODESTONE_BASE_URL}{ffxiv_id}", priority=priority)
+        )
+
+    return (
+        await cache.load(
+            ffxiv_id,
+            "profile",
+            fetch,
+            max_age,
+            None if recheck is None else lambda snapshot: recheck(snapshot.profile),
+        )
+    ).profile
+
+
+async def get_mounts(
+    ffxiv_id: int,
+    max_age: Optional[float] = None,
+    recheck: Optional[Callable[[Set[str]], bool]] = None,
+) -> Set[str]:
+    async def fetch(snapshot: CharacterSnapshot):
+        snapshot.mounts = parse_mounts(
+            await lodestone.get(f"{LODESTONE_BASE_URL}{ffxiv_id}/mount/")
+        )
+
+    return (
+        await cache.load(
+            ffxiv_id,
+            "mount",
+            fetch,
+            max_age,
+            None if recheck is None else lambda snapshot: recheck(snapshot.mounts),
+        )
+    ).mounts
+
+
+async def get_achievement(
+    ffxiv_id: int,
+    achievement_id: int,
+    max_age: Optional[float] = None,
+    recheck: Optional[Callable[[Optional[bool]], bool]] = None,
+) -> Optional[bool]:
+    async def fetch(snapshot: CharacterSnapshot):
+        snapshot.achievements[achievement_id] = parse_achievement(
+            await lodestone.get(
+                f"{LODESTONE_BASE_URL}{ffxiv_id}{LODESTONE_ACHIEVEMENT_BASE_URL}"
+                f"{achievement_id}/"
+            )
+        )
+
+    snapshot = await cache.load(
+        ffxiv_id,
+        ("achievement", achievement_id),
+        fetch,
+        max_age,
+        None
+        if recheck is None
+        else lambda snapshot: recheck(snapshot.achievements.get(achievement_id, None)),
+    )
+    return snapshot.achievements.get(achievement_id, None)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from const import *
+import json
+import os
+from records import VerificationRecord
+import sqlite3
+from typing import *
+
+
+if TYPE_CHECKING:
+    from ba_recruiting import BARun
+
+
+class Storage:
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None  # type: Optional[sqlite3.Connection]
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # Autocommit, so every write is its own small durable transaction
+            self._connection = sqlite3.connect(self.path, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " discord_id INTEGER PRIMARY KEY,"
+                " ffxiv_id INTEGER,"
+                " name TEXT,"
+                " server TEXT,"
+                " token TEXT,"
+                " valid INTEGER)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS ba_runs (id INTEGER PRIMARY KEY, data TEXT)"
+            )
+        return self._connection
+
+    def save_user(self, did: int, record: VerificationRecord):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                did,
+                record.id,
+                record.name,
+                record.server,
+                record.token,
+                int(record.valid),
+            ),
+        )
+
+    def load_users(self) -> Dict[int, VerificationRecord]:
+        return {
+            did: VerificationRecord(ffxiv_id, name, server, token, bool(valid))
+            for did, ffxiv_id, name, server, token, valid in self.connection.execute(
+                "SELECT discord_id, ffxiv_id, name, server, token, valid FROM users"
+            )
+        }
+
+    def save_ba_run(self, run: BARun):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO ba_runs VALUES (?, ?)",
+            (run.id, json.dumps(run.to_dict())),
+        )
+
+    def delete_ba_run(self, id: int):
+        self.connection.execute("DELETE FROM ba_runs WHERE id = ?", (id,))
+
+    def load_ba_runs(self) -> Dict[int, Dict[str, Any]]:
+        return {
+            id: json.loads(data)
+            for id, data in self.connection.execute("SELECT id, data FROM ba_runs")
+        }
+
+    def is_empty(self) -> bool:
+        users = self.connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        runs = self.connection.execute("SELECT COUNT(*) FROM ba_runs").fetchone()[0]
+        return users == 0 and runs == 0
+
+    def import_json(self, verification_path: str, ba_run_path: str):
+        # One time migration from the old whole-file JSON dumps
+        with self.connection:
+            self.connection.execute("BEGIN")
+            if os.path.exists(verification_path):
+                with open(verification_path, "r") as loadfile:
+                    for key, record in json.load(loadfile).items():
+                        self.save_user(
+                            int(key), VerificationRecord.from_dict(record)
+                        )
+            if os.path.exists(ba_run_path):
+                with open(ba_run_path, "r") as loadfile:
+                    for key, run in json.load(loadfile).items():
+                        self.connection.execute(
+                            "INSERT OR REPLACE INTO ba_runs VALUES (?, ?)",
+                            (int(key), json.dumps(run)),
+                        )
+
+    def checkpoint(self):
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def backup(self, path: str):
+        destination = sqlite3.connect(path)
+        try:
+            self.connection.backup(destination)
+        finally:
+            destination.close()
+
+
+database = Storage(STORAGE_PATH)
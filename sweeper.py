@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+from const import *
+import itertools
+import time
+from typing import *
+from utils import read_json, schedule_task, write_json_atomic
+
+
+class NameSweeper:
+    def __init__(
+        self,
+        refresh: Callable[[int], Awaitable[bool]],
+        users: Callable[[], Iterable[int]],
+        workers: int = NAME_SWEEP_WORKERS,
+        path: str = NAME_SWEEP_STATE_PATH,
+    ):
+        self.refresh = refresh
+        self.users = users
+        self.workers = workers
+        self.path = path
+        # Queue of (Priority, Arrival, Discord ID), users missing a name jump the sweep
+        self.queue = (
+            asyncio.PriorityQueue()
+        )  # type: asyncio.PriorityQueue[Tuple[int, int, int]]
+        self.arrivals = itertools.count()
+        self.queued = set()  # type: Set[int]
+        self.checked = 0
+        self.changed = 0
+        self.running = False
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            for _ in range(self.workers):
+                schedule_task(self.work())
+            schedule_task(self.sweep())
+
+    def enqueue(self, did: int, urgent: bool = False):
+        if did in self.queued:
+            return
+        self.queued.add(did)
+        self.queue.put_nowait((0 if urgent else 1, next(self.arrivals), did))
+
+    async def work(self):
+        while True:
+            _, _, did = await self.queue.get()
+            try:
+                if await self.refresh(did):
+                    self.changed += 1
+                self.checked += 1
+            except Exception as e:
+                print(f"Name sweep failed for user {did}: {e!r}")
+            finally:
+                self.queued.discard(did)
+                self.queue.task_done()
+
+    async def sweep(self):
+        started, cursor, finished = self.load()
+        while True:
+            if finished:
+                await asyncio.sleep(
+                    max(started + NAME_SWEEP_INTERVAL.total_seconds() - time.time(), 0)
+                )
+                started, cursor, finished = None, None, False
+            if started is None:
+                started = time.time()
+            # Sorted, so the cursor alone says how far through the sweep we are
+            pending = sorted(
+                did for did in self.users() if cursor is None or did > cursor
+            )
+            for start in range(0, len(pending), NAME_SWEEP_BATCH_SIZE):
+                batch = pending[start : start + NAME_SWEEP_BATCH_SIZE]
+                for did in batch:
+                    self.enqueue(did)
+                await self.queue.join()
+                cursor = batch[-1]
+                self.save(started, cursor, False)
+            finished = True
+            self.save(started, cursor, finished)
+            print(
+                f"Name sweep finished, {self.changed} of {self.checked} checked users"
+                " changed."
+            )
+
+    def save(self, started: float, cursor: Optional[int], finished: bool):
+        write_json_atomic(
+            self.path, {"started": started, "cursor": cursor, "finished": finished}
+        )
+
+    def load(self) -> Tuple[Optional[float], Optional[int], bool]:
+        state = read_json(self.path)
+        if state is None:
+            return None, None, False
+        return state["started"], state["cursor"], state["finished"]
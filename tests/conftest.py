@@ -0,0 +1,24 @@
+import os
+import sys
+
+# The bot's modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def empty_run():
+    # Makes runs with only the roster, not the Discord side of a run
+    pytest.importorskip("discord")
+    pytest.importorskip("aiohttp")
+    from ba_recruiting import BAGroup, BARun
+
+    def make() -> BARun:
+        run = BARun.__new__(BARun)
+        run.groups = [BAGroup(run, [], None, index) for index in range(7)]
+        run.waitlist = []
+        run.refresh_composition()
+        return run
+
+    return make
@@ -0,0 +1,197 @@
+import random
+from typing import *
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("aiohttp")
+
+from ba_recruiting import BAGroup, BARun
+from const import *
+from recruiting import RunMember
+
+
+ROLES = list(BARole)
+
+
+# The composition rules as BARun implemented them before the cached aggregates,
+# kept verbatim so the aggregates can be checked against them.
+class Reference:
+    def __init__(self, groups: List[BAGroup]):
+        self.groups = groups
+        self.roles = [
+            {role: sum(member.role == role for member in group.members) for role in ROLES}
+            for group in groups
+        ]
+
+    def needs(self, index: int) -> List[str]:
+        roles = self.roles[index]
+        need = []
+        if roles[BA_HEALER] == 0:
+            need.append(BA_HEALER)
+        if roles[BA_BLUE_DPS] + roles[BA_MAIN_TANK] == 0:
+            need.extend(BA_ANY_TANK)
+        return need
+
+    def unreserved_space(self, index: int) -> int:
+        return 8 - len(self.groups[index].members) - len(self.needs(index))
+
+    def valid_single(self, index: int, role: str) -> bool:
+        return role in self.needs(index) or self.unreserved_space(index) > 0
+
+    def pair_unreserved_space(self, index: int) -> int:
+        paired = index + (-1 if index % 2 else 1)
+        return (
+            self.unreserved_space(index)
+            + self.unreserved_space(paired)
+            - (self.roles[index][BA_MAIN_TANK] + self.roles[paired][BA_MAIN_TANK] == 0)
+        )
+
+    def valid_pair(self, index: int, role: str) -> bool:
+        paired = index + (-1 if index % 2 else 1)
+        if (
+            self.roles[index][BA_MAIN_TANK] + self.roles[paired][BA_MAIN_TANK] == 0
+            and role == BA_MAIN_TANK
+        ):
+            return True
+        return self.pair_unreserved_space(index) > 0
+
+    def triple_unreserved_space(self, index: int) -> int:
+        mid_burden = int(
+            self.roles[2][BA_MAIN_TANK] + self.roles[3][BA_MAIN_TANK] == 0
+        )
+        if index <= 2:
+            return (
+                self.pair_unreserved_space(0) + self.unreserved_space(2) - mid_burden
+            )
+        else:
+            # The right-hand triple goes through group 4's pair with group 3
+            return (
+                self.pair_unreserved_space(3) + self.unreserved_space(3) - mid_burden
+            )
+
+    def valid_triple(self, index: int, role: str) -> bool:
+        trip = self.roles[:3] if index <= 2 else self.roles[-4:-1]
+        if sum(roles[BA_PRECEPTOR] for roles in trip) == 0 and role == BA_PRECEPTOR:
+            return True
+        return self.triple_unreserved_space(index) > 0
+
+    def full_unreserved_space(self) -> int:
+        all_roles = self.roles[:6]
+        has_spirit_dart = sum(roles[BA_SPIRIT_DART] for roles in all_roles) > 0
+        has_feint = sum(roles[BA_FEINT] for roles in all_roles) > 0
+        return (
+            self.triple_unreserved_space(0)
+            + self.triple_unreserved_space(3)
+            - has_spirit_dart
+            - has_feint
+        )
+
+    def can_add(self, index: int, role: str) -> bool:
+        if not self.valid_single(index, role):
+            return False
+        if not self.valid_pair(index, role):
+            return False
+        if not self.valid_triple(index, role):
+            return False
+        all_roles = self.roles[:6]
+        has_spirit_dart = sum(roles[BA_SPIRIT_DART] for roles in all_roles) > 0
+        has_feint = sum(roles[BA_FEINT] for roles in all_roles) > 0
+        if role == BA_SPIRIT_DART and not has_spirit_dart:
+            return True
+        if role == BA_FEINT and not has_feint:
+            return True
+        else:
+            return self.full_unreserved_space() > 0
+
+
+def assert_matches_reference(run: BARun):
+    reference = Reference(run.groups)
+    for index in range(6):
+        for role in ROLES:
+            assert run.can_add(index, role) == reference.can_add(index, role), (
+                index,
+                role,
+                [group.to_dict()["members"] for group in run.groups],
+            )
+    for role in ROLES:
+        # The old rules raised IndexError for the support group, it only has 5 slots
+        assert run.can_add(6, role) == (len(run.groups[6]) < 5)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_rosters(empty_run, seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        run = empty_run()
+        next_id = 0
+        for group in run.groups:
+            # Any composition, valid or not, so every branch of the rules is reached
+            for _ in range(rng.randint(0, 8 if group.index < 6 else 5)):
+                next_id += 1
+                group.add_member(RunMember("", rng.choice(ROLES), next_id))
+        assert_matches_reference(run)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_changes(empty_run, seed):
+    # The aggregates are updated on every add and remove, check them after each one
+    rng = random.Random(1000 + seed)
+    run = empty_run()
+    next_id = 0
+    for _ in range(400):
+        group = run.groups[rng.randrange(7)]
+        if group.members and (len(group) >= 8 or rng.random() < 0.4):
+            group.remove_member(rng.choice(group.members))
+        else:
+            next_id += 1
+            group.add_member(RunMember("", rng.choice(ROLES), next_id))
+        assert_matches_reference(run)
+
+
+def test_right_hand_triple_quirk(empty_run):
+    run = empty_run()
+    for member_id in range(5):
+        run.groups[3].add_member(RunMember("", BA_RED_DPS, member_id))
+    for member_id in range(5, 13):
+        run.groups[4].add_member(RunMember("", BA_RED_DPS, member_id))
+    for member_id in range(13, 21):
+        run.groups[5].add_member(RunMember("", BA_RED_DPS, member_id))
+    assert_matches_reference(run)
+    reference = Reference(run.groups)
+    # Groups 4 to 6 have no unreserved space, yet the right triple borrows group 3's
+    assert sum(reference.unreserved_space(index) for index in range(3, 6)) <= 0
+    assert run.composition.triple_space[1] > 0
+    assert reference.triple_unreserved_space(3) == run.composition.triple_space[1]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_best_group_for_leaves_groups_untouched(empty_run, seed):
+    rng = random.Random(2000 + seed)
+    for _ in range(50):
+        run = empty_run()
+        next_id = 0
+        for _ in range(rng.randint(0, 56)):
+            index, role = rng.randrange(6), rng.choice(ROLES)
+            if run.can_add(index, role):
+                next_id += 1
+                run.groups[index].add_member(RunMember("", role, next_id))
+        for group in run.groups:
+            group.rendered = f"{group}"
+        before = [group.to_dict() for group in run.groups]
+        for role in ROLES:
+            expected, expected_score = None, -1
+            for index in range(6):
+                # Score by really placing the member, as the solver first did
+                if not run.can_add(index, role):
+                    continue
+                run.groups[index].add_member(RunMember("", role, -1))
+                score = run.flexibility()
+                run.groups[index].remove_member(-1)
+                if score > expected_score:
+                    expected, expected_score = index, score
+            for group in run.groups:
+                group.rendered = f"{group}"
+            assert run.best_group_for(role) == expected
+            assert all(group.rendered is not None for group in run.groups)
+        assert [group.to_dict() for group in run.groups] == before
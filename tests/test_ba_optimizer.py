@@ -0,0 +1,80 @@
+import asyncio
+import random
+from typing import *
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("aiohttp")
+
+from ba_optimizer import RosterSearch, optimize_roster, snapshot
+from ba_recruiting import BARun
+from const import *
+from recruiting import RunMember
+
+
+ROLES = list(BARole)
+
+
+def random_run(empty_run: Callable[[], BARun], rng: random.Random) -> BARun:
+    run = empty_run()
+    for member_id in range(400):
+        role = rng.choice(ROLES)
+        index = run.best_group_for(role)
+        if index is not None:
+            run.groups[index].add_member(RunMember("", role, member_id))
+    return run
+
+
+def test_refused_move_changes_nothing(empty_run):
+    run = empty_run()
+    group = run.groups[0]
+    for member_id, role in enumerate([BA_MAIN_TANK, BA_HEALER, BA_RED_DPS]):
+        group.add_member(RunMember("", role, 100 + member_id))
+    group.leader = 0
+    group.rendered = f"{group}"
+    # The support group is full, so moving the tank there is refused
+    for member_id in range(5):
+        run.groups[6].add_member(RunMember("", BA_RED_DPS, member_id))
+    assert not run.move_member(100, 6)
+    assert [member.id for member in group.members] == [100, 101, 102]
+    assert group.leader == 0
+    assert group.rendered is not None
+
+
+def test_move_keeps_leader_on_the_same_person(empty_run):
+    run = empty_run()
+    group = run.groups[0]
+    for member_id, role in enumerate([BA_MAIN_TANK, BA_HEALER, BA_RED_DPS]):
+        group.add_member(RunMember("", role, 100 + member_id))
+    group.leader = 2
+    assert run.move_member(100, 6)
+    assert group.members[group.leader].id == 102
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_optimize_keeps_roster_valid(empty_run, seed):
+    rng = random.Random(seed)
+    for _ in range(10):
+        run = random_run(empty_run, rng)
+        run.waitlist = [
+            RunMember("", rng.choice(ROLES), 10000 + i) for i in range(8)
+        ]
+        members = sorted(member.id for member in run)
+        result = asyncio.run(optimize_roster(run))
+        assert all(len(group) <= 8 for group in run.groups[:6])
+        placed = sorted(member.id for member, _ in result.placed)
+        assert sorted(member.id for member in run) == sorted(members + placed)
+        assert not set(placed) & {member.id for member in run.waitlist}
+        for member, index in result.placed:
+            assert member in run.groups[index]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_search_leaves_the_live_roster_alone(empty_run, seed):
+    rng = random.Random(500 + seed)
+    run = random_run(empty_run, rng)
+    before = snapshot(run)
+    for role in ROLES:
+        asyncio.run(RosterSearch(run, BA_OPTIMIZE_BUDGET).find_moves(role, 3))
+        assert snapshot(run) == before
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from lodestone_parser import (
+    SelectorParser,
+    parse_achievement,
+    parse_mounts,
+    parse_profile,
+    parse_search_page,
+)
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "lodestone")
+
+
+class Response:
+    # Just the fields of lodestone.LodestoneResponse the parsers read
+    def __init__(self, text: str, status_code: int = 200):
+        self.status_code = status_code
+        self.text = text
+
+
+def fixture(name: str) -> Response:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as page:
+        return Response(page.read())
+
+
+class Collector(SelectorParser):
+    def __init__(self, selectors):
+        super().__init__(selectors)
+        self.texts = []
+
+    def on_end(self, capture):
+        self.texts.append((capture.key, capture.text))
+
+
+def test_profile_fields():
+    profile = parse_profile(fixture("profile.html"))
+    assert profile.name == "Lerald Gee"
+    assert profile.server == "Gilgamesh [Aether]"
+    assert "PHOINIX-3f9c2a71" in profile.self_introduction
+    # Text of nested elements belongs to the introduction too
+    assert "the linkshell" in profile.self_introduction
+    assert "Edited 2024-04-01" in profile.self_introduction
+
+
+def test_profile_missing_character():
+    assert parse_profile(Response("", status_code=404)) is None
+
+
+def test_mounts():
+    mounts = parse_mounts(fixture("mount.html"))
+    assert len(mounts) == 180
+    assert "cd2ec7e8a8e" in mounts
+
+
+def test_mounts_missing_character():
+    assert parse_mounts(Response("", status_code=404)) == set()
+
+
+def test_achievement():
+    assert parse_achievement(fixture("achievement_complete.html")) is True
+    assert parse_achievement(fixture("achievement_incomplete.html")) is False
+    # Hidden achievements come back as a 404
+    assert parse_achievement(Response("", status_code=404)) is None
+
+
+def test_search_page():
+    page = parse_search_page(fixture("search.html"))
+    assert page.num_pages == 3
+    assert len(page.entries) == 50
+    assert (30000000 + 3 * 7919, "Lerald Gee", "Cactuar [Aether]") in page.entries
+
+
+def test_search_page_without_pager():
+    page = parse_search_page(Response("<div class='parts__total'>0 results</div>"))
+    assert page.num_pages == 1
+    assert page.entries == []
+
+
+def test_capture_ends_at_matching_close_tag():
+    parser = Collector({"intro": ("div", "intro")})
+    parser.run(
+        '<div class="intro">a<div>b<div>c</div></div>d</div><div>outside</div>'
+    )
+    assert parser.texts == [("intro", "abcd")]
+
+
+def test_capture_ignores_other_tags_for_depth():
+    parser = Collector({"name": ("p", "name")})
+    parser.run('<p class="name"><span>Lerald</span> <i></i>Gee</p><p>outside</p>')
+    assert parser.texts == [("name", "Lerald Gee")]
+
+
+def test_nested_captures_are_independent():
+    parser = Collector({"outer": ("div", "outer"), "inner": ("p", "inner")})
+    parser.run('<div class="outer">x<p class="inner">y</p>z</div>')
+    assert parser.texts == [("inner", "y"), ("outer", "xyz")]
+
+
+@pytest.mark.parametrize(
+    "classes", ["intro", "intro other", "other intro", "  intro  "]
+)
+def test_class_matching(classes):
+    parser = Collector({"intro": ("div", "intro")})
+    parser.run(f'<div class="{classes}">text</div>')
+    assert parser.texts == [("intro", "text")]
+
+
+def test_class_must_match_whole_token():
+    parser = Collector({"intro": ("div", "intro")})
+    parser.run('<div class="introduction">text</div><div>intro</div>')
+    assert parser.texts == []
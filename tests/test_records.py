@@ -0,0 +1,34 @@
+import sys
+
+from records import VerificationRecord
+
+
+def test_round_trip():
+    data = {
+        "id": 27162130,
+        "name": "Lerald Gee",
+        "server": "Gilgamesh [Aether]",
+        "token": "3f9c2a71",
+        "valid": True,
+    }
+    record = VerificationRecord.from_dict(data)
+    assert record.to_dict() == data
+    assert VerificationRecord.from_dict(record.to_dict()).to_dict() == data
+
+
+def test_new_registration_is_unverified():
+    record = VerificationRecord(27162130, "Lerald Gee", "Gilgamesh", "abc")
+    assert record.to_dict()["valid"] is False
+
+
+def test_server_is_interned():
+    first = VerificationRecord(1, "A B", "".join(["Gilgamesh", " [Aether]"]), "t")
+    second = VerificationRecord(2, "C D", "".join(["Gilgamesh", " [Aether]"]), "t")
+    assert first.server is second.server
+    first.server = "".join(["Sargatanas", " [Aether]"])
+    assert first.server is sys.intern("Sargatanas [Aether]")
+
+
+def test_slotted():
+    record = VerificationRecord(1, "A B", "Gilgamesh", "t")
+    assert not hasattr(record, "__dict__")
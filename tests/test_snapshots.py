@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import lodestone
+import snapshots
+
+
+class Response:
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.text = text
+
+
+MOUNTS = (
+    '<li class="mount__list_icon" data-tooltip_href="/lodestone/character/1/mount/tooltip/{}"></li>'
+)
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    # Maps URL -> Page text, every request made is recorded
+    served = {}
+    requested = []
+
+    async def get(url, params=None, priority=None):
+        requested.append(url)
+        return Response(served[url])
+
+    monkeypatch.setattr(lodestone, "get", get)
+    monkeypatch.setattr(snapshots, "cache", snapshots.SnapshotCache())
+    return served, requested
+
+
+def mounts_url(ffxiv_id: int) -> str:
+    return f"{snapshots.LODESTONE_BASE_URL}{ffxiv_id}/mount/"
+
+
+def test_miss_on_a_cold_cache_fetches_once(pages):
+    served, requested = pages
+    served[mounts_url(1)] = MOUNTS.format("other")
+    mounts = asyncio.run(
+        snapshots.get_mounts(1, recheck=lambda mounts: "wanted" not in mounts)
+    )
+    assert "wanted" not in mounts
+    assert requested == [mounts_url(1)]
+
+
+def test_miss_on_a_cached_page_fetches_again(pages):
+    served, requested = pages
+
+    async def run():
+        served[mounts_url(1)] = MOUNTS.format("other")
+        await snapshots.get_mounts(1)
+        served[mounts_url(1)] = MOUNTS.format("wanted")
+        return await snapshots.get_mounts(
+            1, recheck=lambda mounts: "wanted" not in mounts
+        )
+
+    assert "wanted" in asyncio.run(run())
+    assert requested == [mounts_url(1), mounts_url(1)]
+
+
+def test_hit_on_a_cached_page_is_trusted(pages):
+    served, requested = pages
+
+    async def run():
+        served[mounts_url(1)] = MOUNTS.format("wanted")
+        await snapshots.get_mounts(1)
+        return await snapshots.get_mounts(
+            1, recheck=lambda mounts: "wanted" not in mounts
+        )
+
+    assert "wanted" in asyncio.run(run())
+    assert requested == [mounts_url(1)]
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("aiohttp")
+
+from utils import read_json, write_json_atomic
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "state.json")
+    write_json_atomic(path, {"cursor": 3, "finished": False})
+    assert read_json(path) == {"cursor": 3, "finished": False}
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_overwrite_replaces_whole_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    write_json_atomic(path, {"changes": list(range(100))})
+    write_json_atomic(path, {"changes": []})
+    assert read_json(path) == {"changes": []}
+
+
+def test_missing_file(tmp_path):
+    assert read_json(str(tmp_path / "missing.json")) is None
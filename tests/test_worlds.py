@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("discord")
+
+from const import FFXIV_SERVERS
+from worlds import WorldMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return WorldMatcher(FFXIV_SERVERS)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Gilgamesh",
+        "gilgamesh",
+        "GILGAMESH",
+        "Gilgamesh [Aether]",
+        "Gilgamesh[Aether]",
+        "gilgamesh (Aether)",
+        "  Gilgamesh  ",
+    ],
+)
+def test_match_returns_canonical_world(matcher, text):
+    assert matcher.match(text) == "Gilgamesh"
+
+
+def test_match_rejects_typos(matcher):
+    assert matcher.match("Gilgamish") is None
+
+
+def test_suggest_close_worlds(matcher):
+    assert "Gilgamesh" in matcher.suggest("Gilgamish")
+    assert "Gilgamesh" in matcher.suggest("gilgamish [Aether]")
+
+
+def test_validate_server_returns_canonical_world():
+    pytest.importorskip("aiohttp")
+    from utils import validate_server
+
+    assert validate_server("gilgamesh[Aether]") == ("Gilgamesh", "")
+    world, message = validate_server("Gilgamish")
+    assert world is None
+    assert "'Gilgamesh'" in message
@@ -1,42 +1,29 @@
 from __future__ import annotations
 
 import asyncio
-import bs4
+import character_search
 from const import *
+import contextlib
 import datetime
 import discord
 import globals
 import json
-import nltk
-import re
-import requests
+import os
+import ratelimit
+from records import VerificationRecord
+import search_index
+import snapshots
+import storage
+import time
 import types
 from typing import *
+import worlds
 
 
 if TYPE_CHECKING:
     from bot import PhoinixBot
 
 
-with open("secrets/xivapikey") as key:
-    xivapikey = key.read()
-
-MAX_RATE = 10
-CALLS_REMAINING = MAX_RATE
-CALL_LOCK = asyncio.Lock()
-HAS_CALLS = asyncio.Condition(CALL_LOCK)
-API_SESSION = requests.Session()
-API_SESSION.params["private_key"] = xivapikey
-
-
-async def consume_limited_call():
-    global CALLS_REMAINING, HAS_CALLS
-    async with HAS_CALLS:
-        while CALLS_REMAINING == 0:
-            await HAS_CALLS.wait()
-        CALLS_REMAINING -= 1
-
-
 def delayed(delay_secs: float):
     def delayed_deco(func):
         async def delayed_wrapper(*args, **kwargs):
@@ -51,11 +38,18 @@ def delayed(delay_secs: float):
     return delayed_deco
 
 
-def extract_hammertime_timestamps(content: str) -> List[datetime.datetime]:
-    return [
-        datetime.datetime.fromtimestamp(stamp, datetime.timezone.utc)
-        for stamp in set(int(val) for val in re.findall("<t:(\d+):\w>", content))
-    ]
+@contextlib.contextmanager
+def timed(stage: str):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        print(f"{stage} took {time.monotonic() - started:.2f}s")
+
+
+async def run_stage(stage: str, coro: Awaitable):
+    with timed(stage):
+        await coro
 
 
 def generate_hammertime_timestamp(dtime: datetime.datetime) -> str:
@@ -66,106 +60,37 @@ def generate_hammertime_timestamp_detailed(dtime: datetime.datetime) -> str:
     return f"<t:{int(dtime.timestamp())}:F> ({generate_hammertime_timestamp(dtime)})"
 
 
-async def validate_message_tags(
-    m: discord.Message, member: Optional[discord.Member], role_ids: List[int]
-):
-    if member is None:
-        print(f"FUCKED ID: {m.author.id}")
-    else:
-        for role in member.roles:
-            if role.id in [
-                ROLE_ID_MAP["Admin"],
-                ROLE_ID_MAP["Moderator"],
-                ROLE_ID_MAP["Bots"],
-            ]:
-                return
-
-    if member.bot:
-        return
-
-    bad_message = True
-    for role_mention in m.role_mentions:
-        if role_mention.id in role_ids:
-            bad_message = False
-            break
-    if bad_message:
-        schedule_task(
-            m.reply(
-                "Please ensure messages in this channel mention at least one of DRS/BA"
-                " Learners/Reclears. Your message will be deleted in 30 seconds.",
-                delete_after=30,
-            )
-        )
-        schedule_task(m.delete(delay=30))
-
-
-def extract_react_bindings(content: str) -> List[Tuple[discord.PartialEmoji, int]]:
-    return [
-        (discord.PartialEmoji.from_str(binding[0]), int(binding[1]))
-        for binding in re.findall("\s*(\S+?)\s+=[a-zA-z* ]*<@&(\d+)>", content)
-    ]
-
-
-def lodestone_search(
+async def lodestone_search(
     name: str,
     server: str,
 ) -> Optional[Dict[str, Union[str, int]]]:
-    page = 1
-    numPages = 1
-
-    while page <= min(numPages, 5):
-        request = requests.get(
-            LODESTONE_BASE_URL, params={"q": "\"" + name + "\"", "page": page, "worldname": server}
-        )
-        result = bs4.BeautifulSoup(
-            request.content.decode(),
-            "html.parser",
-        )
-        numPagesHTML = result.find("li", "btn__pager__current")
-
-        if numPagesHTML is not None:
-            numPagesMatch = re.match(r"Page \d+ of (\d+)", numPagesHTML.text)
-            if numPagesMatch is not None:
-                numPages = int(numPagesMatch[1])
-
-        for player in result.find_all("a", "entry__link"):
-            found_name, found_server, _, _ = list(player.stripped_strings)  # type: str
-            found_id = player["href"].split("/")[-2]
-            if found_name == name and found_server.startswith(server):
-                return {
-                    "id": int(found_id),
-                    "name": found_name,
-                    "server": found_server,
-                }
-        page += 1
-
-    return None
+    return await character_search.engine.search(name, server)
 
 
-def extract_name_server(
-    id: int, req: Optional[requests.Response] = None
+async def extract_name_server(
+    id: int, priority: int = ratelimit.PRIORITY_INTERACTIVE
 ) -> Optional[Tuple[str, str]]:
-    request = req if req is not None else requests.get(f"{LODESTONE_BASE_URL}{id}")
-    if request.status_code == 404:
+    profile = await snapshots.get_profile(id, priority=priority)
+    if profile is None:
         return None
-    result = bs4.BeautifulSoup(
-        request.content.decode(),
-        "html.parser",
-    )
-    name = result.find("p", "frame__chara__name").text
-    server = result.find("p", "frame__chara__world").text
-    return name, server
-
-
-def full_validate(
-    registered_data: Dict[str, Union[bool, int, str]]
-) -> Union[str, Dict[str, Union[bool, int, str]]]:
-    cid = registered_data["id"]
-    name = registered_data["name"]
-    server = registered_data["server"]
-    token = registered_data["token"]
-    resp = requests.get(f"{LODESTONE_BASE_URL}{cid}")
-    fname, fserver = extract_name_server(cid, resp)
+    return profile.name, profile.server
+
+
+async def full_validate(
+    registered_data: VerificationRecord,
+) -> Union[str, VerificationRecord]:
+    cid = registered_data.id
+    name = registered_data.name
+    server = registered_data.server
+    token = registered_data.token
+    has_token = await user_has_token_in_profile(cid, token)
+    profile = await snapshots.get_profile(cid)
+    if profile is None:
+        return (
+            f"Could not find character with ID {cid}. Try using the Register button"
+            " again."
+        )
+    fname, fserver = profile.name, profile.server
     if fname != name:
         return (
             f"Name {name} does not match name associated with character with ID {cid},"
@@ -176,59 +101,33 @@ def full_validate(
             f"Server {server} does not match server associated with character with ID"
             f" {cid}, {fserver}. Try using the Register button again."
         )
-    if not user_has_token_in_profile(cid, token, resp):
+    if not has_token:
         return (
             f"Token, `{token}` (can be copied from {ECHO_TOKEN_URL}{token}), not found"
             f" in character profile at {LODESTONE_BASE_URL}{cid}\n Additionally, **ensure your lodestone is not set to private.**"
         )
-    registered_data["server"] = fserver  # Adds [Datacenter]
-    registered_data["valid"] = True
+    registered_data.server = fserver  # Adds [Datacenter]
+    registered_data.valid = True
     return registered_data
 
 
-async def refresh_calls_loop():
-    await asyncio.sleep(1)
-    global CALLS_REMAINING, HAS_CALLS
-    async with HAS_CALLS:
-        CALLS_REMAINING = MAX_RATE
-        HAS_CALLS.notify(MAX_RATE)
-    schedule_task(refresh_calls_loop())
-
-
-def user_has_token_in_profile(
-    ffxiv_id: int, token: str, resp: Optional[requests.Response] = None
-) -> bool:
-    resp = resp if resp is not None else requests.get(f"{LODESTONE_BASE_URL}{ffxiv_id}")
-    profile = bs4.BeautifulSoup(resp.content.decode(), "html.parser",).find_all(
-        "div", "character__selfintroduction"
-    )[
-        0
-    ]  # type: bs4.element.Tag
+async def user_has_token_in_profile(ffxiv_id: int, token: str) -> bool:
+    def has_token(profile: Optional[snapshots.CharacterProfile]) -> bool:
+        return profile is not None and token in profile.self_introduction
 
-    return token in str(profile)
-
-
-def user_has_achievement(ffxiv_id: int, achievement_code: int) -> Optional[bool]:
-    ACHIEVEMENT_BASE_URL = (
-        f"{LODESTONE_BASE_URL}{ffxiv_id}{LODESTONE_ACHIEVEMENT_BASE_URL}"
-    )
-    req = requests.get(f"{ACHIEVEMENT_BASE_URL}{achievement_code}/")
-    if req.status_code == 404:
-        return None  # signals hidden achievements
-    return (
-        len(
-            bs4.BeautifulSoup(req.content.decode(), "html.parser").find_all(
-                "div",
-                "entry__achievement__view entry__achievement__view--complete",
-            )
+    # A cached profile may predate the token being added, so a miss there looks again
+    return has_token(
+        await snapshots.get_profile(
+            ffxiv_id, recheck=lambda profile: not has_token(profile)
         )
-        > 0
     )
 
 
-async def trigger_later(event: asyncio.Event, delay: float):
-    await asyncio.sleep(delay)
-    event.set()
+async def user_has_achievement(ffxiv_id: int, achievement_code: int) -> Optional[bool]:
+    # A cached page may predate the unlock, or achievements being made public
+    return await snapshots.get_achievement(
+        ffxiv_id, achievement_code, recheck=lambda has: not has
+    )
 
 
 async def wait_and_clear(event: asyncio.Event):
@@ -236,6 +135,22 @@ async def wait_and_clear(event: asyncio.Event):
     event.clear()
 
 
+def write_json_atomic(path: str, state: Any):
+    # Written to the side and swapped in, so a crash never leaves a torn file
+    with open(f"{path}.tmp", "w") as dumpfile:
+        json.dump(state, dumpfile)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_json(path: str) -> Optional[Any]:
+    # None if nothing has been saved there yet
+    try:
+        with open(path, "r") as loadfile:
+            return json.load(loadfile)
+    except FileNotFoundError:
+        return None
+
+
 def schedule_task(coro):
     task = asyncio.create_task(coro)
     globals.background_tasks.add(task)
@@ -258,50 +173,39 @@ def generate_button(
 
 
 def load_verification_map():
-    with open("data/verification_map.json", "r") as loadfile:
-        str_verification_map = json.load(
-            loadfile
-        )  # type: Dict[str, Dict[str, Union[bool, int, str]]]
-        for key in str_verification_map.keys():
-            globals.verification_map[int(key)] = str_verification_map[key]
-        print(f"Loaded {len(globals.verification_map)} users.")
+    if storage.database.is_empty():
+        storage.database.import_json(
+            "data/verification_map.json", "data/ba_run_post_map.json"
+        )
+    globals.verification_map.update(storage.database.load_users())
+    for did, record in globals.verification_map.items():
+        search_index.names.update(did, record.name, record.server)
+    print(f"Loaded {len(globals.verification_map)} users.")
 
 
 def load_ba_run_map(bot: PhoinixBot):
-    with open("data/ba_run_post_map.json", "r") as loadfile:
-        str_ba_run_post_map = json.load(loadfile)
-        import ba_recruiting
-
-        for key in str_ba_run_post_map.keys():
-            globals.ba_run_post_map[int(key)] = ba_recruiting.BARun(
-                bot=bot, **str_ba_run_post_map[key]
-            )
-
-
-def validate_server(server: str) -> (bool, str):
-    if server.capitalize() in FFXIV_SERVERS:
-        return True, ""
-    suggestion, _ = min(
-        (
-            (tserver, nltk.edit_distance(server.capitalize(), tserver))
-            for tserver in FFXIV_SERVERS
-        ),
-        key=lambda p: p[1],
+    import ba_recruiting
+
+    for key, run in storage.database.load_ba_runs().items():
+        globals.ba_run_post_map[key] = ba_recruiting.BARun(bot=bot, **run)
+
+
+def validate_server(server: str) -> Tuple[Optional[str], str]:
+    # Returns the canonical world name, or None and a message suggesting close worlds
+    world = worlds.matcher.match(server)
+    if world is not None:
+        return world, ""
+    suggestions = worlds.matcher.suggest(server)
+    if not suggestions:
+        return None, f"'{server}' is not a server."
+    return None, (
+        f"'{server}' is not a server. Did you mean"
+        f" {' or '.join(f'{suggestion!r}' for suggestion in suggestions)}?"
     )
-    return False, f"'{server}' is not a server. Did you mean '{suggestion}'?"
 
 
-def validate_mount(ffxiv_id: int, mount_id: str) -> bool:
-
-    req = requests.get(f"{LODESTONE_BASE_URL}{ffxiv_id}/mount/")
-    parsed = bs4.BeautifulSoup(req.text, "html.parser")
-    return (
-        parsed.find(
-            "li",
-            attrs={
-                "class": "mount__list_icon",
-                "data-tooltip_href": f"/lodestone/character/{ffxiv_id}/mount/tooltip/{mount_id}",
-            },
-        )
-        is not None
+async def validate_mount(ffxiv_id: int, mount_id: str) -> bool:
+    # A cached mount list may predate the mount being obtained, so a miss looks again
+    return mount_id in await snapshots.get_mounts(
+        ffxiv_id, recheck=lambda mounts: mount_id not in mounts
     )
@@ -1,8 +1,14 @@
 import globals
-import bot
 from const import *
 import discord
-from utils import validate_server, extract_name_server
+import registry
+from utils import (
+    extract_name_server,
+    full_validate,
+    user_has_achievement,
+    validate_mount,
+    validate_server,
+)
 from urllib.parse import urlsplit
 
 
@@ -50,11 +56,9 @@ class VerificationModal(discord.ui.DesignerModal):
             name = " ".join(
                 part.capitalize() for part in name_field.value.split(" ")
             ).replace("’", "'")
-            server = server_field.value.split(" ")[0].capitalize()
+            server, suggested_server = validate_server(server_field.value.strip())
 
-            valid_server, suggested_server = validate_server(server)
-
-            if not valid_server:
+            if server is None:
                 await fakedefer.edit_original_response(
                     content=suggested_server,
                 )
@@ -78,7 +82,7 @@ class VerificationModal(discord.ui.DesignerModal):
                             content=f"Expected '/character/CHARACTER_ID' in URL, but found non-numeric ID: '{part}'"
                         )
                         return
-                    name_server_pair = extract_name_server(character_id)
+                    name_server_pair = await extract_name_server(character_id)
                 prev_part_is_character = part == "character"
 
             if name_server_pair is None:
@@ -93,7 +97,7 @@ class VerificationModal(discord.ui.DesignerModal):
             )
             return
 
-        if await bot.register_user(
+        if await registry.register_user(
             interaction.user.id,
             name,
             server,
@@ -101,10 +105,10 @@ class VerificationModal(discord.ui.DesignerModal):
         ):
             await fakedefer.edit_original_response(
                 content=(
-                    f"Registration successful! Add `{bot.get_user_token(interaction.user.id)}`"
+                    f"Registration successful! Add `{registry.get_user_token(interaction.user.id)}`"
                     " to your character profile on the Lodestone, then **click the"
                     " Verify button.** If you cannot copy your token, try copying from"
-                    f" {ECHO_TOKEN_URL}{bot.get_user_token(interaction.user.id)}\nYour"
+                    f" {ECHO_TOKEN_URL}{registry.get_user_token(interaction.user.id)}\nYour"
                     " character profile can be found here:"
                     " https://na.finalfantasyxiv.com/lodestone/my/setting/profile/"
                 ),
@@ -139,7 +143,7 @@ class VerificationView(discord.ui.View):
         response = await interaction.response.send_message(
             "Verifying...", ephemeral=True
         )  # type: discord.Interaction
-        if not bot.known_discord_id(interaction.user.id):
+        if not registry.known_discord_id(interaction.user.id):
             await response.edit_original_response(
                 content=(
                     "You must register first! Click the Register button and follow the"
@@ -147,17 +151,18 @@ class VerificationView(discord.ui.View):
                 ),
             )
             return
-        if globals.verification_map[interaction.user.id]["valid"]:
+        if globals.verification_map[interaction.user.id].valid:
             await response.edit_original_response(content="You are already verified!")
             member = await self.bot.fetch_member(interaction.user.id)
             await member.add_roles(discord.Object(ROLE_ID_MAP["Member"]))
             return
-        result = bot.full_validate(globals.verification_map[interaction.user.id])
+        result = await full_validate(globals.verification_map[interaction.user.id])
         if type(result) == str:
             await response.edit_original_response(content=result)
         else:
             try:
                 globals.verification_map[interaction.user.id] = result
+                registry.save_user(interaction.user.id)
                 member = await self.bot.fetch_member(interaction.user.id)
                 await member.add_roles(discord.Object(ROLE_ID_MAP["Member"]))
                 if ROLE_ID_MAP["Not Verified"] in [role.id for role in member.roles]:
@@ -239,7 +244,7 @@ class VerificationView(discord.ui.View):
         interaction: discord.Interaction,
     ):
         member = interaction.user
-        ffxiv_id = bot.get_user_ffxiv_id(interaction.user.id)
+        ffxiv_id = registry.get_user_ffxiv_id(interaction.user.id)
         if ffxiv_id is None:
             await interaction.response.send_message(
                 "You must register and verify first!",
@@ -258,7 +263,7 @@ class VerificationView(discord.ui.View):
                 needed_achievement = ACHIEVEMENT_ID_MAP[mapping["needed achievement"]]
                 given_role = ROLE_ID_MAP[mapping["given role"]]
 
-                if bot.user_has_achievement(ffxiv_id, needed_achievement):
+                if await user_has_achievement(ffxiv_id, needed_achievement):
                     await member.add_roles(discord.Object(given_role))
                     await interaction.response.send_message(
                         "Role added!",
@@ -288,14 +293,14 @@ class VerificationView(discord.ui.View):
         mount_id: str,
         role: int,
     ):
-        if not bot.known_discord_id(interaction.user.id):
+        if not registry.known_discord_id(interaction.user.id):
             await interaction.response.send_message(
                 "You are not registered! Click the Register button, follow the"
                 " instructions, then click the Verify button, then try this button"
                 " again.",
                 ephemeral=True,
             )
-        elif not globals.verification_map[interaction.user.id]["valid"]:
+        elif not globals.verification_map[interaction.user.id].valid:
             await interaction.response.send_message(
                 "You are not verified! Click the Verify button, then try this button"
                 " again.",
@@ -305,8 +310,8 @@ class VerificationView(discord.ui.View):
             response = await interaction.response.send_message(
                 "Checking achievements...", ephemeral=True
             )  # type: discord.Interaction
-            ffxiv_id = bot.get_user_ffxiv_id(interaction.user.id)
-            has = bot.validate_mount(ffxiv_id, mount_id) or bot.user_has_achievement(
+            ffxiv_id = registry.get_user_ffxiv_id(interaction.user.id)
+            has = await validate_mount(ffxiv_id, mount_id) or await user_has_achievement(
                 ffxiv_id, achievement_id
             )
             if has is None:
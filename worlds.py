@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import bisect
+from const import *
+import re
+from typing import *
+
+
+WORLD_SUFFIX = re.compile(r"\s*[\[(].*$")
+
+
+def normalize_world(text: str) -> str:
+    # "Gilgamesh [Aether]" and "gilgamesh (Aether)" both mean gilgamesh
+    text = WORLD_SUFFIX.sub("", text.strip())
+    return text.split(" ")[0].lower() if text else ""
+
+
+def edit_distance(a: str, b: str, bound: int) -> int:
+    # Levenshtein, giving up with bound + 1 as soon as every path is over the bound
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return previous[-1]
+
+
+def deletions(word: str, depth: int) -> Set[str]:
+    # Every string reachable from word by deleting up to depth characters
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {
+            variant[:i] + variant[i + 1 :]
+            for variant in frontier
+            for i in range(len(variant))
+        }
+        found |= frontier
+    return found
+
+
+class WorldMatcher:
+    def __init__(
+        self, worlds: Iterable[str], max_distance: int = WORLD_SUGGESTION_DISTANCE
+    ):
+        self.max_distance = max_distance
+        # Maps Lowercased World -> World
+        self.canonical = {world.lower(): world for world in worlds}
+        # Maps Deletion Variant -> Lowercased Worlds. Two strings within max_distance
+        # edits always share a variant, so a query only looks up its own variants.
+        self.variants = {}  # type: Dict[str, Set[str]]
+        for world in self.canonical:
+            for variant in deletions(world, max_distance):
+                self.variants.setdefault(variant, set()).add(world)
+        self.sorted = sorted(self.canonical)
+        self.longest = max(len(world) for world in self.canonical)
+
+    def match(self, text: str) -> Optional[str]:
+        return self.canonical.get(normalize_world(text), None)
+
+    def suggest(self, text: str, limit: int = WORLD_SUGGESTION_LIMIT) -> List[str]:
+        key = normalize_world(text)
+        if not key:
+            return []
+        ranked = {}  # type: Dict[str, int]
+        if len(key) <= self.longest + self.max_distance:
+            candidates = set()
+            for variant in deletions(key, self.max_distance):
+                candidates |= self.variants.get(variant, set())
+            for world in candidates:
+                distance = edit_distance(key, world, self.max_distance)
+                if distance <= self.max_distance:
+                    ranked[world] = distance
+        # Worlds the text is the start of rank as one edit, so "gilga" finds Gilgamesh
+        start = bisect.bisect_left(self.sorted, key)
+        for world in self.sorted[start:]:
+            if not world.startswith(key):
+                break
+            ranked[world] = min(ranked.get(world, 1), 1)
+        best = sorted(ranked, key=lambda world: (ranked[world], world))
+        return [self.canonical[world] for world in best[:limit]]
+
+
+matcher = WorldMatcher(FFXIV_SERVERS)